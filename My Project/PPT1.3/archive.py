@@ -0,0 +1,287 @@
+"""
+Deduplicating archive for past service decks.
+
+Each archived deck becomes a small manifest (part names, order, zip metadata) over a
+content-addressed store of parts: every part is stored once, by the SHA-1 of its
+uncompressed bytes, as the compressed bytes found in the first deck that had it. The
+template media, masters and recurring song slides of fifty weekly decks therefore take
+the space of one. Rebuilding copies the stored compressed bytes straight into a new zip
+(nothing is recompressed), so restoring last month's deck takes milliseconds.
+
+Layout of an archive folder:
+    objects/ab/cdef...   compressed part bytes (name = SHA-1 of the uncompressed part)
+    manifests/<deck>.<id>.json
+
+A manifest id is a hash of the deck's contents and its full source path, so two decks
+with the same file name (every "금요기도회.pptx" of the year, or the same name in two
+folders) are archived side by side. Archiving the same deck again replaces its manifest.
+Decks are looked up by id, by full source path, or by file name when that is unique.
+
+Usage: python archive.py ARCHIVE add DECK_OR_FOLDER ... [--move]
+       python archive.py ARCHIVE list
+       python archive.py ARCHIVE rebuild DECK_ID_PATH_OR_NAME [OUTPUT]
+       python archive.py ARCHIVE check
+"""
+import os
+import sys
+import json
+import zlib
+import hashlib
+import zipfile
+import argparse
+import datetime
+from ooxml import Package, read_raw_entry, write_raw_package
+
+MANIFEST_VERSION = 2
+ID_LENGTH = 12
+
+# Object files start with the compression method of the bytes that follow
+_STORED_TAG = b"S"
+_DEFLATED_TAG = b"D"
+
+
+def _write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _decompress(compress_type, raw):
+    return zlib.decompress(raw, -15) if compress_type == zipfile.ZIP_DEFLATED else raw
+
+
+class DeckArchive:
+    def __init__(self, folder):
+        self.folder = folder
+        self.objects_dir = os.path.join(folder, "objects")
+        self.manifests_dir = os.path.join(folder, "manifests")
+
+    # --- Objects ---
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def _store(self, digest, compress_type, raw):
+        """Stores a part once. Returns the number of bytes added to the store."""
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return 0
+        if compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise ValueError(f"Unsupported compression method {compress_type}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tag = _DEFLATED_TAG if compress_type == zipfile.ZIP_DEFLATED else _STORED_TAG
+        _write_atomic(path, tag + raw)
+        return len(raw) + 1
+
+    def _load(self, digest):
+        """(compress_type, compressed bytes) of a stored part."""
+        with open(self._object_path(digest), "rb") as f:
+            data = f.read()
+        compress_type = zipfile.ZIP_DEFLATED if data[:1] == _DEFLATED_TAG else zipfile.ZIP_STORED
+        return compress_type, data[1:]
+
+    # --- Manifests ---
+
+    def _manifest_path(self, manifest):
+        return os.path.join(self.manifests_dir, f"{manifest['name']}.{manifest['id']}.json")
+
+    def manifests(self):
+        """All manifests, oldest archived first."""
+        result = []
+        if not os.path.isdir(self.manifests_dir):
+            return result
+        for name in os.listdir(self.manifests_dir):
+            if name.endswith(".json"):
+                with open(os.path.join(self.manifests_dir, name), "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+                # Older manifests were named after the deck alone and may not record the source.
+                # Their id comes from that file name, so it never equals a deck name.
+                manifest.setdefault("id", hashlib.sha1(name.encode("utf-8")).hexdigest()[:ID_LENGTH])
+                manifest.setdefault("source", "")
+                result.append(manifest)
+        result.sort(key=lambda m: (m["archived"], m["name"]))
+        return result
+
+    def manifest(self, deck):
+        """The manifest of one archived deck, by id, full source path or (unique) file name."""
+        manifests = self.manifests()
+        for key in ("id", "source"):
+            value = os.path.abspath(deck) if key == "source" else deck
+            found = [m for m in manifests if m[key] and m[key] == value]
+            if len(found) == 1:
+                return found[0]
+        found = [m for m in manifests if m["name"] == os.path.basename(deck)]
+        if not found:
+            raise KeyError(f"'{deck}' is not in the archive")
+        if len(found) > 1:
+            ids = ", ".join(f"{m['id']} ({m['source'] or 'source unknown'}, {m['archived']})" for m in found)
+            raise KeyError(f"'{deck}' matches {len(found)} archived decks, give the id: {ids}")
+        return found[0]
+
+    # --- Public operations ---
+
+    def add(self, deck_path):
+        """Archives one deck. Returns (manifest, bytes added to the store)."""
+        pkg = Package(deck_path)
+        entries = []
+        added = 0
+        with open(deck_path, "rb") as fp:
+            for name in pkg.names():
+                info = pkg.info(name)
+                raw = read_raw_entry(fp, info)
+                data = _decompress(info.compress_type, raw)
+                if zlib.crc32(data) != info.CRC:
+                    raise zipfile.BadZipFile(f"Bad CRC-32 for {name} in {deck_path}")
+                digest = hashlib.sha1(data).hexdigest()
+                added += self._store(digest, info.compress_type, raw)
+                entries.append([name, digest, info.CRC, info.file_size, list(info.date_time)])
+        source = os.path.abspath(deck_path)
+        content = hashlib.sha1(json.dumps([e[:2] for e in entries]).encode("utf-8")).hexdigest()
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "id": hashlib.sha1(f"{content}\n{source}".encode("utf-8")).hexdigest()[:ID_LENGTH],
+            "name": os.path.basename(deck_path),
+            "source": source,
+            "content": content,
+            "archived": datetime.datetime.now().isoformat(timespec="seconds"),
+            "size": os.path.getsize(deck_path),
+            "slides": len(pkg.slide_names()),
+            "entries": entries,
+        }
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        _write_atomic(self._manifest_path(manifest),
+                      json.dumps(manifest, ensure_ascii=False, indent=0).encode("utf-8"))
+        return manifest, added
+
+    def rebuild(self, deck, output_path):
+        """Writes the archived deck (id, source path or file name) to output_path (via a temporary file)."""
+        manifest = self.manifest(deck)
+
+        def raw_entries():
+            for name, digest, crc, file_size, date_time in manifest["entries"]:
+                compress_type, raw = self._load(digest)
+                info = zipfile.ZipInfo(name, tuple(date_time))
+                info.compress_type = compress_type
+                info.CRC = crc
+                info.file_size = file_size
+                yield info, raw
+
+        tmp_path = output_path + ".tmp"
+        try:
+            write_raw_package(tmp_path, raw_entries())
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return manifest
+
+    def check(self):
+        """Verifies every object referenced by a manifest. Returns (errors, warnings)."""
+        errors = []
+        warnings = []
+        referenced = {}
+        for manifest in self.manifests():
+            for name, digest, crc, file_size, _ in manifest["entries"]:
+                referenced.setdefault(digest, (manifest["name"], name, crc))
+        for digest, (deck, name, crc) in sorted(referenced.items()):
+            try:
+                compress_type, raw = self._load(digest)
+                data = _decompress(compress_type, raw)
+            except (OSError, zlib.error) as e:
+                errors.append(f"{deck}: {name} is missing or unreadable ({e})")
+                continue
+            if hashlib.sha1(data).hexdigest() != digest or zlib.crc32(data) != crc:
+                errors.append(f"{deck}: {name} is corrupt")
+        if os.path.isdir(self.objects_dir):
+            for prefix in os.listdir(self.objects_dir):
+                for rest in os.listdir(os.path.join(self.objects_dir, prefix)):
+                    if prefix + rest not in referenced:
+                        warnings.append(f"Unreferenced object {prefix}{rest}")
+        return errors, warnings
+
+    def store_size(self):
+        total = 0
+        for root, _, files in os.walk(self.objects_dir):
+            total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+        return total
+
+
+def _deck_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(".pptx") and not name.startswith("~$"):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deduplicating archive for past service decks.")
+    parser.add_argument("archive", help="archive folder")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add_cmd = commands.add_parser("add", help="archive decks (files or folders of .pptx)")
+    add_cmd.add_argument("paths", nargs="+")
+    add_cmd.add_argument("--move", action="store_true", help="delete each deck once it is archived and verified")
+    commands.add_parser("list", help="list archived decks and the space saved")
+    rebuild_cmd = commands.add_parser("rebuild", help="restore an archived deck")
+    rebuild_cmd.add_argument("name", help="deck id, source path or file name as listed")
+    rebuild_cmd.add_argument("output", nargs="?", help="output path (default: the name, in the current folder)")
+    commands.add_parser("check", help="verify every archived part")
+    args = parser.parse_args(argv)
+
+    archive = DeckArchive(args.archive)
+    if args.command == "add":
+        for path in _deck_paths(args.paths):
+            try:
+                manifest, added = archive.add(path)
+            except (OSError, zipfile.BadZipFile, ValueError) as e:
+                print(f"Error: Could not archive {path}: {e}")
+                continue
+            print(f"Archived {manifest['name']} as {manifest['id']}: {manifest['size']:,} bytes, {added:,} new bytes stored")
+            if args.move:
+                # Only delete once the deck can be rebuilt with the same contents
+                check_path = path + ".verify"
+                archive.rebuild(manifest["id"], check_path)
+                with zipfile.ZipFile(check_path) as zf:
+                    ok = zf.testzip() is None and len(zf.infolist()) == len(manifest["entries"])
+                os.remove(check_path)
+                if ok:
+                    os.remove(path)
+                else:
+                    print(f"Error: Rebuilt copy of {path} did not verify; original kept")
+    elif args.command == "list":
+        manifests = archive.manifests()
+        original = 0
+        for m in manifests:
+            original += m["size"]
+            print(f"{m['id']}  {m['archived']}  {m['size']:>12,}  {m['slides']:>3} slides  {m['source'] or m['name']}")
+        stored = archive.store_size()
+        ratio = f" ({original / stored:.1f}x smaller)" if stored else ""
+        print(f"{len(manifests)} deck(s), {original:,} bytes as files, {stored:,} bytes in the store{ratio}")
+    elif args.command == "rebuild":
+        try:
+            manifest = archive.manifest(args.name)
+        except KeyError as e:
+            print(f"Error: {e.args[0]}")
+            return 1
+        output = args.output or manifest["name"]
+        archive.rebuild(manifest["id"], output)
+        print(f"Rebuilt: {os.path.abspath(output)}")
+    elif args.command == "check":
+        errors, warnings = archive.check()
+        for msg in warnings:
+            print(f"Warning: {msg}")
+        for msg in errors:
+            print(f"Error: {msg}")
+        if errors:
+            return 1
+        print("Archive OK.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Checkpoints for generate_ppt so a run that dies with PowerPoint can resume.
+
+Next to the output file we keep '<name>.checkpoint.json' (completed phases, converted
+song lists) and the partially built deck, saved at a few coarse safe points only: every
+checkpoint save writes the whole deck. A rerun with the same inputs picks up from the
+last checkpoint instead of the template.
+"""
+import os
+import json
+import hashlib
+import contextlib
+
+PHASE_CONVERTED = "converted"
+PHASE_TEMPLATE = "template"
+PHASE_SONGS_BEFORE = "songs_before"
+PHASE_BIBLE_BREAK = "bible_break"
+
+
+def inputs_key(files, values):
+    """
+    Fingerprint of one generation request: every argument plus size/mtime of every input file,
+    so a checkpoint is never reused after a song or the template changed.
+    """
+    h = hashlib.sha1()
+    h.update(json.dumps(values, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    for path in files:
+        try:
+            st = os.stat(path)
+            h.update(f"{path}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+        except OSError:
+            h.update(f"{path}|missing\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+class Checkpoint:
+    def __init__(self, output_path, key):
+        base = os.path.splitext(os.path.abspath(output_path))[0]
+        self.folder = os.path.dirname(base)
+        self.base_name = os.path.basename(base)
+        self.state_path = base + ".checkpoint.json"
+        self.key = key
+        self.state = {"key": key, "phases": [], "deck": None, "generation": 0}
+
+    def load(self):
+        """Loads a matching checkpoint. Returns True when there is something to resume."""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get("key") != self.key:
+            print("Ignoring checkpoint from a different request.")
+            self.clear()
+            return False
+        if state.get("deck") and not os.path.exists(self.deck_path(state)):
+            print("Ignoring checkpoint: saved deck is missing.")
+            self.clear()
+            return False
+        self.state = state
+        return bool(state.get("phases"))
+
+    def deck_path(self, state=None):
+        state = state or self.state
+        if not state.get("deck"):
+            return None
+        return os.path.join(self.folder, state["deck"])
+
+    def done(self, phase):
+        return phase in self.state["phases"]
+
+    def get(self, name, default=None):
+        return self.state.get(name, default)
+
+    def record(self, *phases, pres=None, operation=None, **data):
+        """
+        Records progress. When pres is given, the deck is saved first under a new name and
+        the state file is switched to it afterwards, so a crash in between never pairs a
+        deck with the wrong state. operation(name, detail) wraps the save so a watchdog can
+        time it out. The previous deck is removed once the state is written.
+        """
+        old_deck = self.deck_path()
+        if pres is not None:
+            self.state["generation"] += 1
+            deck_name = f"{self.base_name}.partial{self.state['generation']}.pptx"
+            with (operation or _no_operation)("save_checkpoint", deck_name):
+                pres.SaveCopyAs(os.path.join(self.folder, deck_name))
+            self.state["deck"] = deck_name
+        self.state.update(data)
+        for phase in phases:
+            if phase not in self.state["phases"]:
+                self.state["phases"].append(phase)
+
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.state_path)
+
+        if pres is not None and old_deck and old_deck != self.deck_path():
+            try:
+                os.remove(old_deck)
+            except OSError as e:
+                # Usually still open in PowerPoint (resumed from it); clear() removes it later
+                print(f"Warning: Could not remove old checkpoint deck {old_deck}: {e}")
+
+    def partial_decks(self):
+        """Every '<name>.partialN.pptx' next to the output, including ones left by earlier runs."""
+        prefix = self.base_name + ".partial"
+        try:
+            names = os.listdir(self.folder)
+        except OSError:
+            return []
+        return [os.path.join(self.folder, n) for n in names if n.startswith(prefix) and n.endswith(".pptx")]
+
+    def clear(self):
+        """Removes the state file and all saved decks (after a successful run or when stale)."""
+        for path in self.partial_decks() + [self.state_path]:
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"Warning: Could not remove checkpoint file {path}: {e}")
+
+
+def _no_operation(name, detail=""):
+    return contextlib.nullcontext()
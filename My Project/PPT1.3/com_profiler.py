@@ -0,0 +1,186 @@
+"""
+Opt-in profiler for PowerPoint COM traffic.
+
+Every property get/set, method call and collection iteration on a COM object is a
+cross-process round-trip. ComProfiler wraps the objects PowerPointManager hands out in
+recording proxies, times each access and attributes it to the calling line, then
+aggregates the hot spots per attribute and per function.
+
+Enable it with the environment variable PPT_COM_PROFILE=1 (add PPT_COM_PROFILE=log to
+also print every single access as it happens).
+"""
+import os
+import sys
+import time
+
+ENV_VAR = "PPT_COM_PROFILE"
+
+_THIS_FILE = os.path.normcase(os.path.abspath(__file__))
+
+
+def profiler_from_env():
+    """Returns a ComProfiler when PPT_COM_PROFILE is set, otherwise None."""
+    value = os.environ.get(ENV_VAR, "").strip().lower()
+    if not value or value in ("0", "false", "no"):
+        return None
+    return ComProfiler(log=(value == "log"))
+
+
+def _is_com_object(value):
+    # pywin32 dispatch wrappers (dynamic and makepy) all carry _oleobj_
+    return hasattr(value, "_oleobj_")
+
+
+def _unwrap(value):
+    if isinstance(value, ComProxy):
+        return object.__getattribute__(value, "_obj")
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(v) for v in value)
+    return value
+
+
+def _call_site():
+    """First frame outside this module: ('main.py:412', 'insert_songs_at')."""
+    frame = sys._getframe(2)
+    while frame and os.path.normcase(os.path.abspath(frame.f_code.co_filename)) == _THIS_FILE:
+        frame = frame.f_back
+    if not frame:
+        return "?", "?"
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno}", frame.f_code.co_name
+
+
+class ComProfiler:
+    def __init__(self, log=False):
+        self.log = log
+        self.by_attribute = {}  # "Shape.TextFrame (get)" -> [calls, seconds]
+        self.by_site = {}       # ("main.py:412", "insert_songs_at") -> [calls, seconds]
+        self.by_function = {}   # "insert_songs_at" -> [calls, seconds]
+        self.total_calls = 0
+        self.total_time = 0.0
+
+    def wrap(self, value, label):
+        if _is_com_object(value) and not isinstance(value, ComProxy):
+            return ComProxy(value, label, self)
+        return value
+
+    def record(self, kind, label, name, elapsed):
+        site, function = _call_site()
+        key = f"{label}.{name} ({kind})" if name else f"{label} ({kind})"
+        for table, k in ((self.by_attribute, key), (self.by_site, (site, function)), (self.by_function, function)):
+            entry = table.setdefault(k, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+        self.total_calls += 1
+        self.total_time += elapsed
+        if self.log:
+            print(f"[COM] {elapsed * 1000:8.2f} ms  {key:<45} {site} in {function}")
+
+    def report(self, top=20):
+        """Text report of the hottest attributes, lines and functions."""
+        lines = [f"COM profile: {self.total_calls} calls, {self.total_time:.3f}s total"]
+
+        def section(title, table, fmt):
+            lines.append("")
+            lines.append(title)
+            lines.append(f"  {'calls':>7} {'total s':>9} {'avg ms':>8}  name")
+            ranked = sorted(table.items(), key=lambda item: item[1][1], reverse=True)[:top]
+            for key, (calls, seconds) in ranked:
+                lines.append(f"  {calls:>7} {seconds:>9.3f} {seconds / calls * 1000:>8.2f}  {fmt(key)}")
+
+        section("By attribute:", self.by_attribute, str)
+        section("By call site:", self.by_site, lambda k: f"{k[0]} ({k[1]})")
+        section("By function:", self.by_function, str)
+        return "\n".join(lines)
+
+
+class ComProxy:
+    """Forwards everything to the wrapped COM object and records the latency of each access."""
+    __slots__ = ("_obj", "_label", "_profiler")
+
+    def __init__(self, obj, label, profiler):
+        object.__setattr__(self, "_obj", obj)
+        object.__setattr__(self, "_label", label)
+        object.__setattr__(self, "_profiler", profiler)
+
+    def __getattr__(self, name):
+        obj = object.__getattribute__(self, "_obj")
+        label = object.__getattribute__(self, "_label")
+        profiler = object.__getattribute__(self, "_profiler")
+        start = time.perf_counter()
+        try:
+            value = getattr(obj, name)
+        finally:
+            profiler.record("get", label, name, time.perf_counter() - start)
+        if callable(value) and not _is_com_object(value):
+            # Bound method such as pres.Close: time the call, not the lookup
+            return _MethodProxy(value, label, name, profiler)
+        return profiler.wrap(value, name)
+
+    def __setattr__(self, name, value):
+        obj = object.__getattribute__(self, "_obj")
+        profiler = object.__getattribute__(self, "_profiler")
+        start = time.perf_counter()
+        try:
+            setattr(obj, name, _unwrap(value))
+        finally:
+            profiler.record("set", object.__getattribute__(self, "_label"), name, time.perf_counter() - start)
+
+    def __call__(self, *args, **kwargs):
+        # Default-member calls such as Slides(1)
+        obj = object.__getattribute__(self, "_obj")
+        label = object.__getattribute__(self, "_label")
+        profiler = object.__getattribute__(self, "_profiler")
+        start = time.perf_counter()
+        try:
+            value = obj(*_unwrap(args), **{k: _unwrap(v) for k, v in kwargs.items()})
+        finally:
+            profiler.record("call", label + "()", "", time.perf_counter() - start)
+        return profiler.wrap(value, label + "()")
+
+    def __iter__(self):
+        obj = object.__getattribute__(self, "_obj")
+        label = object.__getattribute__(self, "_label")
+        profiler = object.__getattribute__(self, "_profiler")
+        iterator = iter(obj)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                profiler.record("iter", label + "[]", "", time.perf_counter() - start)
+                return
+            profiler.record("iter", label + "[]", "", time.perf_counter() - start)
+            yield profiler.wrap(item, label + "[]")
+
+    def __len__(self):
+        return len(object.__getattribute__(self, "_obj"))
+
+    def __bool__(self):
+        return object.__getattribute__(self, "_obj") is not None
+
+    def __eq__(self, other):
+        return object.__getattribute__(self, "_obj") == _unwrap(other)
+
+    def __hash__(self):
+        return hash(object.__getattribute__(self, "_obj"))
+
+    def __repr__(self):
+        return f"<ComProxy {object.__getattribute__(self, '_label')}: {object.__getattribute__(self, '_obj')!r}>"
+
+
+class _MethodProxy:
+    __slots__ = ("_method", "_label", "_name", "_profiler")
+
+    def __init__(self, method, label, name, profiler):
+        self._method = method
+        self._label = label
+        self._name = name
+        self._profiler = profiler
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            value = self._method(*_unwrap(args), **{k: _unwrap(v) for k, v in kwargs.items()})
+        finally:
+            self._profiler.record("call", self._label, self._name, time.perf_counter() - start)
+        return self._profiler.wrap(value, self._name + "()")
@@ -0,0 +1,249 @@
+"""
+Supervised COM worker for generate_ppt.
+
+generate_ppt runs in a child process. Around every COM call that can block
+(Presentations.Open, SaveAs, InsertFromFile, paste, ...) the worker tells the
+supervisor which operation started and how long it may take. If an operation
+overruns its timeout, or the worker goes silent for too long, the supervisor kills
+the PowerPoint process the worker started (by PID, never every POWERPNT.EXE) and the
+worker itself, reports which operation hung and starts a fresh worker, which resumes
+from the generation checkpoint.
+
+prestart_worker() starts a worker ahead of time: it imports generate_ppt and initialises
+COM, then waits for its job, so the next run does not pay for process start-up.
+"""
+import os
+import sys
+import time
+import signal
+import subprocess
+import threading
+import contextlib
+import multiprocessing
+
+# Seconds a single COM operation may take before the worker is considered hung
+OPERATION_TIMEOUTS = {
+    "Dispatch": 60,
+    "Presentations.Open": 60,
+    "SaveAs": 120,
+    "Save": 120,
+    "save_checkpoint": 120,
+    "InsertFromFile": 90,
+    "PasteSourceFormatting": 60,
+    "Quit": 30,
+}
+DEFAULT_OPERATION_TIMEOUT = 60
+
+# Longest silence allowed between two reports while no operation is running
+IDLE_TIMEOUT = 120
+
+MAX_RESTARTS = 1
+
+# Worker started by prestart_worker(): (process, result connection, job connection)
+_spare_worker = None
+_spare_lock = threading.Lock()
+
+
+def powerpoint_pids():
+    """Returns the PIDs of all running POWERPNT.EXE processes (Windows only)."""
+    if sys.platform != "win32":
+        return set()
+    try:
+        out = subprocess.run(
+            ["tasklist", "/FI", "IMAGENAME eq POWERPNT.EXE", "/FO", "CSV", "/NH"],
+            capture_output=True, text=True, timeout=10,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        ).stdout
+    except Exception:
+        return set()
+    pids = set()
+    for line in out.splitlines():
+        fields = [f.strip('"') for f in line.split('","')]
+        if len(fields) > 1 and fields[1].isdigit():
+            pids.add(int(fields[1]))
+    return pids
+
+
+def kill_pid(pid):
+    """Force-kills one process by PID."""
+    try:
+        if sys.platform == "win32":
+            subprocess.run(["taskkill", "/PID", str(pid), "/F"], capture_output=True, timeout=15,
+                           creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        else:
+            os.kill(pid, signal.SIGKILL)
+    except Exception as e:
+        print(f"Warning: Could not kill process {pid}: {e}")
+
+
+class WatchdogReporter:
+    """Worker-side end of the pipe. Passed to PowerPointManager as its watchdog."""
+    def __init__(self, conn):
+        self.conn = conn
+        self.pids_before = set()
+
+    def send(self, *message):
+        try:
+            self.conn.send(message)
+        except (OSError, EOFError):
+            pass
+
+    def before_dispatch(self):
+        self.pids_before = powerpoint_pids()
+
+    def attach(self, app):
+        """Reports the PID of the PowerPoint process behind app."""
+        try:
+            import win32process
+            pid = win32process.GetWindowThreadProcessId(app.HWND)[1]
+        except Exception as e:
+            print(f"Warning: Could not determine PowerPoint PID: {e}")
+            return
+        # PowerPoint is single-instance: if it was already running we share the user's process
+        self.send("pid", pid, pid in self.pids_before)
+
+    @contextlib.contextmanager
+    def operation(self, name, detail=""):
+        self.send("begin", name, detail, OPERATION_TIMEOUTS.get(name, DEFAULT_OPERATION_TIMEOUT))
+        try:
+            yield
+        finally:
+            self.send("end", name)
+
+
+def _worker_main(conn, job_conn):
+    import pythoncom
+    from main import generate_ppt
+
+    pythoncom.CoInitialize()
+    try:
+        args, kwargs = job_conn.recv()
+    except (EOFError, OSError):
+        # Spare worker that was never used
+        conn.close()
+        return
+    job_conn.close()
+
+    reporter = WatchdogReporter(conn)
+    try:
+        errors, warnings = generate_ppt(*args, watchdog=reporter, **kwargs)
+        reporter.send("result", errors, warnings)
+    except Exception as e:
+        reporter.send("result", [f"Worker failed: {e}"], [])
+    finally:
+        conn.close()
+
+
+def _start_worker():
+    parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+    job_recv, job_send = multiprocessing.Pipe(duplex=False)
+    proc = multiprocessing.Process(target=_worker_main, args=(child_conn, job_recv), daemon=True)
+    proc.start()
+    child_conn.close()
+    job_recv.close()
+    return proc, parent_conn, job_send
+
+
+def prestart_worker():
+    """Starts a spare worker (if none is waiting) for the next run to pick up."""
+    global _spare_worker
+    with _spare_lock:
+        if _spare_worker is None or not _spare_worker[0].is_alive():
+            _spare_worker = _start_worker()
+
+
+def _take_worker():
+    global _spare_worker
+    with _spare_lock:
+        worker, _spare_worker = _spare_worker, None
+    if worker is not None and worker[0].is_alive():
+        return worker
+    return _start_worker()
+
+
+def _run_once(args, kwargs, idle_timeout):
+    """
+    Runs one worker until it returns a result or hangs.
+    Returns (result, failure_message); exactly one of them is None.
+    """
+    proc, parent_conn, job_conn = _take_worker()
+    try:
+        job_conn.send((args, kwargs))
+    except (OSError, EOFError):
+        # The spare worker died while waiting
+        proc, parent_conn, job_conn = _start_worker()
+        job_conn.send((args, kwargs))
+    job_conn.close()
+
+    ppt_pid = None
+    shared = False
+    current = None  # (name, detail, deadline)
+    deadline = time.monotonic() + idle_timeout
+    failure = None
+
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            if current:
+                name, detail, timeout = current
+                what = f"{name}({detail})" if detail else name
+                failure = f"PowerPoint operation {what} did not finish within {timeout}s."
+            else:
+                failure = f"Worker made no progress for {idle_timeout}s."
+            break
+        try:
+            if not parent_conn.poll(min(remaining, 1.0)):
+                if not proc.is_alive() and not parent_conn.poll():
+                    failure = f"Worker exited unexpectedly (exit code {proc.exitcode})."
+                    break
+                continue
+            message = parent_conn.recv()
+        except (EOFError, OSError):
+            failure = f"Worker exited unexpectedly (exit code {proc.exitcode})."
+            break
+
+        kind = message[0]
+        if kind == "result":
+            proc.join(10)
+            return (message[1], message[2]), None
+        if kind == "pid":
+            ppt_pid, shared = message[1], message[2]
+        elif kind == "begin":
+            current = (message[1], message[2], message[3])
+            deadline = time.monotonic() + message[3]
+            continue
+        elif kind == "end":
+            current = None
+        deadline = time.monotonic() + idle_timeout
+
+    # Hung or crashed: clean up only what this worker owns
+    print(f"Watchdog: {failure}")
+    if ppt_pid and not shared:
+        print(f"Watchdog: killing PowerPoint (PID {ppt_pid}).")
+        kill_pid(ppt_pid)
+    elif ppt_pid and shared:
+        failure += " PowerPoint was already open before generation, so it was not killed; use FIX PPT if it stays stuck."
+    if proc.is_alive():
+        proc.terminate()
+        proc.join(10)
+    return None, failure
+
+
+def run_supervised(args, kwargs=None, max_restarts=MAX_RESTARTS, idle_timeout=IDLE_TIMEOUT):
+    """
+    Runs generate_ppt(*args, **kwargs) in a supervised worker process.
+    Returns (errors, warnings) like generate_ppt. Hangs are reported with the name of the
+    operation that timed out; after a restart the worker resumes from the checkpoint.
+    """
+    kwargs = kwargs or {}
+    failures = []
+    for attempt in range(max_restarts + 1):
+        if attempt:
+            print(f"Watchdog: restarting worker (attempt {attempt + 1}), resuming from checkpoint...")
+        result, failure = _run_once(args, kwargs, idle_timeout)
+        if result:
+            errors, warnings = result
+            # Recovered: keep the hang visible but do not fail the run because of it
+            return list(errors), [f"Recovered after: {f}" for f in failures] + list(warnings)
+        failures.append(failure)
+    return failures, []
@@ -0,0 +1,216 @@
+"""
+Slide master / layout deduplication for generated decks.
+
+PasteSourceFormatting (and InsertFromFile + design reapply) bring each song's master,
+layouts and theme into the output, so a 10-song service carries many near-identical
+copies. compact_deck() fingerprints masters, layouts and themes by their normalised XML
+(volatile ids and rIds replaced by the fingerprint of what they point to), merges
+duplicates, repoints slides, drops layouts and masters no slide uses and finally removes
+every part that is no longer reachable (orphaned themes, media).
+
+Usage: python compaction.py deck.pptx [output.pptx]
+"""
+import os
+import re
+import sys
+import hashlib
+from ooxml import Package, parse_attrs, RT_SLIDE_LAYOUT, RT_SLIDE_MASTER
+
+_VOLATILE_RE = re.compile(
+    r"<p14:creationId\b[^>]*/>|<a16:creationId\b[^>]*/>|<p:sldLayoutIdLst>.*?</p:sldLayoutIdLst>", re.S)
+_RID_ATTR_RE = re.compile(r'(r:(?:id|embed|link|pict|dm|lo|qs|cs))="([^"]*)"')
+_SLD_LAYOUT_ID_RE = re.compile(r"<p:sldLayoutId\s[^>]*?/>")
+_SLD_MASTER_ID_RE = re.compile(r"<p:sldMasterId\s[^>]*?/>")
+
+# Back-references that must not take part in a fingerprint (they would make it cyclic)
+_SKIPPED_TYPES = (RT_SLIDE_LAYOUT, RT_SLIDE_MASTER)
+
+
+class _Fingerprinter:
+    def __init__(self, pkg):
+        self.pkg = pkg
+        self.cache = {}
+
+    def part(self, name):
+        if name in self.cache:
+            return self.cache[name]
+        self.cache[name] = "cycle:" + name  # Guards against unexpected reference cycles
+        data = self.pkg.read(name)
+        if not name.endswith(".xml"):
+            digest = hashlib.sha1(data).hexdigest()
+        else:
+            rels = {r.rid: r for r in self.pkg.rels(name)}
+
+            def target_fp(rel):
+                if rel.rel_type in _SKIPPED_TYPES:
+                    return ""
+                if rel.external:
+                    return "ext:" + rel.target
+                return self.part(rel.target) if self.pkg.has(rel.target) else "missing"
+
+            def replace_rid(m):
+                rel = rels.get(m.group(2))
+                return '{}="{}"'.format(m.group(1), target_fp(rel) if rel else m.group(2))
+
+            xml = _VOLATILE_RE.sub("", data.decode("utf-8"))
+            xml = _RID_ATTR_RE.sub(replace_rid, xml)
+            # Implicit relationships (e.g. master -> theme) are not referenced from the XML
+            linked = sorted("{}|{}".format(r.rel_type, target_fp(r)) for r in rels.values()
+                            if r.rel_type not in _SKIPPED_TYPES)
+            digest = hashlib.sha1((xml + "\n".join(linked)).encode("utf-8")).hexdigest()
+        self.cache[name] = digest
+        return digest
+
+
+def fingerprint_parts(pkg, names):
+    """Structural fingerprints {part name: sha1} as used for merging (also used by inspect_deck)."""
+    fp = _Fingerprinter(pkg)
+    return {name: fp.part(name) for name in names}
+
+
+def _remove_id_entry(pkg, owner, id_re, rid):
+    xml = pkg.read_text(owner)
+    pkg.write(owner, id_re.sub(lambda m: "" if parse_attrs(m.group(0)).get("r:id") == rid else m.group(0), xml))
+    pkg.write_rels(owner, [r for r in pkg.rels(owner) if r.rid != rid])
+
+
+def collect_garbage(pkg):
+    """Drops every part that can no longer be reached from the package root. Returns their names."""
+    reachable = set()
+    stack = [""]
+    while stack:
+        part = stack.pop()
+        for rel in pkg.rels(part):
+            if not rel.external and rel.target not in reachable and pkg.has(rel.target):
+                reachable.add(rel.target)
+                stack.append(rel.target)
+
+    removed = []
+    for name in pkg.names():
+        if name == "[Content_Types].xml" or name.endswith(".rels") or name in reachable:
+            continue
+        pkg.drop_part(name)
+        removed.append(name)
+    # Rels files whose owner is gone
+    for name in pkg.names():
+        if name.endswith(".rels") and name != "_rels/.rels":
+            folder, rels_file = name.rsplit("/_rels/", 1)
+            if not pkg.has(folder + "/" + rels_file[:-len(".rels")]):
+                pkg.delete(name)
+    return removed
+
+
+def compact_package(pkg):
+    """Deduplicates masters/layouts in an open Package. Returns a stats dict."""
+    pres_name = pkg.main_part()
+    pres_rels = {r.rid: r for r in pkg.rels(pres_name)}
+    masters = []
+    for tag in _SLD_MASTER_ID_RE.findall(pkg.read_text(pres_name)):
+        rel = pres_rels.get(parse_attrs(tag).get("r:id"))
+        if rel and pkg.has(rel.target):
+            masters.append(rel.target)
+
+    master_layouts = {m: [r.target for r in pkg.rels(m) if r.rel_type == RT_SLIDE_LAYOUT and pkg.has(r.target)]
+                      for m in masters}
+    layout_master = {l: m for m, layouts in master_layouts.items() for l in layouts}
+    slides = pkg.slide_names()
+    slide_layout = {}
+    for slide in slides:
+        for rel in pkg.rels(slide):
+            if rel.rel_type == RT_SLIDE_LAYOUT:
+                slide_layout[slide] = rel.target
+
+    fp = _Fingerprinter(pkg)
+    layout_fp = {l: fp.part(l) for l in layout_master}
+    master_fp = {m: fp.part(m) for m in masters}
+
+    # 1. Merge duplicate masters into the first identical one, when every layout in use has a twin
+    layout_map = {}
+    canonical = {}
+    for m in masters:
+        c = canonical.setdefault(master_fp[m], m)
+        if c == m:
+            continue
+        twins = {}
+        for l in master_layouts[c]:
+            twins.setdefault(layout_fp[l], l)
+        used = {slide_layout[s] for s in slides if layout_master.get(slide_layout.get(s)) == m}
+        if all(layout_fp[l] in twins for l in used):
+            for l in master_layouts[m]:
+                if layout_fp[l] in twins:
+                    layout_map[l] = twins[layout_fp[l]]
+
+    # 2. Identical layouts inside one master
+    for m in masters:
+        seen = {}
+        for l in master_layouts[m]:
+            if l in layout_map:
+                continue
+            first = seen.setdefault(layout_fp[l], l)
+            if first != l:
+                layout_map[l] = first
+
+    # 3. Repoint slides
+    repointed = 0
+    for slide, layout in slide_layout.items():
+        if layout in layout_map:
+            rels = pkg.rels(slide)
+            for rel in rels:
+                if rel.rel_type == RT_SLIDE_LAYOUT:
+                    rel.target = layout_map[layout]
+            pkg.write_rels(slide, rels)
+            slide_layout[slide] = layout_map[layout]
+            repointed += 1
+
+    # 4. Drop unreferenced layouts, then masters without any layout in use (at least one master stays)
+    used_layouts = set(slide_layout.values())
+    kept_masters = [m for m in masters if any(l in used_layouts for l in master_layouts[m])] or masters[:1]
+    removed_layouts = 0
+    removed_masters = 0
+    for m in masters:
+        if m not in kept_masters:
+            rid = next(r.rid for r in pkg.rels(pres_name) if r.target == m)
+            _remove_id_entry(pkg, pres_name, _SLD_MASTER_ID_RE, rid)
+            removed_masters += 1
+            removed_layouts += len(master_layouts[m])
+            continue
+        if not any(l in used_layouts for l in master_layouts[m]):
+            continue  # Fallback master of a deck without slides: keep it intact
+        for rel in pkg.rels(m):
+            if rel.rel_type == RT_SLIDE_LAYOUT and rel.target not in used_layouts:
+                _remove_id_entry(pkg, m, _SLD_LAYOUT_ID_RE, rel.rid)
+                removed_layouts += 1
+
+    # 5. Themes, layouts, masters and media nobody points to any more
+    removed_parts = collect_garbage(pkg)
+    return {
+        "masters_removed": removed_masters,
+        "layouts_removed": removed_layouts,
+        "slides_repointed": repointed,
+        "parts_removed": len(removed_parts),
+    }
+
+
+def compact_deck(path, output_path=None):
+    """
+    Compacts the deck at path and writes it to output_path (default: in place). Package.save
+    goes through a temporary file in the same folder and removes it if the save fails, so
+    nothing is left next to the deck. Returns the stats dict.
+    """
+    output_path = output_path or path
+    pkg = Package(path)
+    stats = compact_package(pkg)
+    if not any(stats.values()) and output_path == path:
+        return stats
+    pkg.save(output_path)
+    return stats
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+    before = os.path.getsize(sys.argv[1])
+    result = compact_deck(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    after = os.path.getsize(sys.argv[2] if len(sys.argv) > 2 else sys.argv[1])
+    print(f"{result} | {before:,} -> {after:,} bytes")
@@ -0,0 +1,204 @@
+"""
+Lyrics-only companion output for the livestream laptop and the stage confidence monitor.
+
+Built from the same songs and Bible text as the main deck, but without backgrounds,
+imported masters or media: a minimal .pptx with one plain layout (white text on black)
+plus the same slide sequence as JSON and plain text. The result is a few KB per song.
+"""
+import os
+import json
+from ooxml import Package, paragraph_texts, write_package, xml_text
+
+SLIDE_WIDTH = 9144000
+SLIDE_HEIGHT = 5143500
+FONT_SIZE = 3200  # hundredths of a point
+FONT_FACE = "맑은 고딕"
+
+_NS = ('xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+       'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+       'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"')
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\r\n'
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_CT_PML = "application/vnd.openxmlformats-officedocument.presentationml"
+
+_EMPTY_TREE = ('<p:spTree><p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr>'
+               '<p:grpSpPr/>{}</p:spTree>')
+
+_THEME = (
+    _XML_DECL +
+    '<a:theme xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" name="Lyrics">'
+    '<a:themeElements><a:clrScheme name="Lyrics">'
+    '<a:dk1><a:srgbClr val="000000"/></a:dk1><a:lt1><a:srgbClr val="FFFFFF"/></a:lt1>'
+    '<a:dk2><a:srgbClr val="1F1F1F"/></a:dk2><a:lt2><a:srgbClr val="EEEEEE"/></a:lt2>'
+    '<a:accent1><a:srgbClr val="4472C4"/></a:accent1><a:accent2><a:srgbClr val="ED7D31"/></a:accent2>'
+    '<a:accent3><a:srgbClr val="A5A5A5"/></a:accent3><a:accent4><a:srgbClr val="FFC000"/></a:accent4>'
+    '<a:accent5><a:srgbClr val="5B9BD5"/></a:accent5><a:accent6><a:srgbClr val="70AD47"/></a:accent6>'
+    '<a:hlink><a:srgbClr val="0563C1"/></a:hlink><a:folHlink><a:srgbClr val="954F72"/></a:folHlink>'
+    '</a:clrScheme><a:fontScheme name="Lyrics">'
+    '<a:majorFont><a:latin typeface="Calibri"/><a:ea typeface=""/><a:cs typeface=""/></a:majorFont>'
+    '<a:minorFont><a:latin typeface="Calibri"/><a:ea typeface=""/><a:cs typeface=""/></a:minorFont>'
+    '</a:fontScheme><a:fmtScheme name="Lyrics"><a:fillStyleLst>'
+    + '<a:solidFill><a:schemeClr val="phClr"/></a:solidFill>' * 3 +
+    '</a:fillStyleLst><a:lnStyleLst>'
+    + '<a:ln w="6350"><a:solidFill><a:schemeClr val="phClr"/></a:solidFill></a:ln>' * 3 +
+    '</a:lnStyleLst><a:effectStyleLst>'
+    + '<a:effectStyle><a:effectLst/></a:effectStyle>' * 3 +
+    '</a:effectStyleLst><a:bgFillStyleLst>'
+    + '<a:solidFill><a:schemeClr val="phClr"/></a:solidFill>' * 3 +
+    '</a:bgFillStyleLst></a:fmtScheme></a:themeElements></a:theme>'
+)
+
+_MASTER = (
+    _XML_DECL + '<p:sldMaster ' + _NS + '><p:cSld>'
+    '<p:bg><p:bgPr><a:solidFill><a:srgbClr val="000000"/></a:solidFill><a:effectLst/></p:bgPr></p:bg>'
+    + _EMPTY_TREE.format("") + '</p:cSld>'
+    '<p:clrMap bg1="dk1" tx1="lt1" bg2="dk2" tx2="lt2" accent1="accent1" accent2="accent2" accent3="accent3" '
+    'accent4="accent4" accent5="accent5" accent6="accent6" hlink="hlink" folHlink="folHlink"/>'
+    '<p:sldLayoutIdLst><p:sldLayoutId id="2147483649" r:id="rId1"/></p:sldLayoutIdLst>'
+    '<p:txStyles><p:titleStyle><a:lvl1pPr><a:defRPr sz="4400"/></a:lvl1pPr></p:titleStyle>'
+    '<p:bodyStyle><a:lvl1pPr><a:defRPr sz="' + str(FONT_SIZE) + '"/></a:lvl1pPr></p:bodyStyle>'
+    '<p:otherStyle><a:lvl1pPr><a:defRPr sz="1800"/></a:lvl1pPr></p:otherStyle></p:txStyles>'
+    '</p:sldMaster>'
+)
+
+_LAYOUT = (
+    _XML_DECL + '<p:sldLayout ' + _NS + ' type="blank" preserve="1"><p:cSld name="Blank">'
+    + _EMPTY_TREE.format("") + '</p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sldLayout>'
+)
+
+_SLIDE = (
+    _XML_DECL + '<p:sld ' + _NS + '><p:cSld>' + _EMPTY_TREE +
+    '</p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sld>'
+)
+
+_TEXT_BOX = (
+    '<p:sp><p:nvSpPr><p:cNvPr id="2" name="Lyrics"/><p:cNvSpPr txBox="1"/><p:nvPr/></p:nvSpPr>'
+    '<p:spPr><a:xfrm><a:off x="{x}" y="{y}"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+    '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></p:spPr>'
+    '<p:txBody><a:bodyPr wrap="square" anchor="ctr"><a:normAutofit/></a:bodyPr><a:lstStyle/>{paras}</p:txBody></p:sp>'
+)
+
+_PARAGRAPH = (
+    '<a:p><a:pPr algn="ctr"/><a:r><a:rPr lang="ko-KR" sz="{sz}" dirty="0">'
+    '<a:solidFill><a:srgbClr val="FFFFFF"/></a:solidFill><a:latin typeface="{font}"/><a:ea typeface="{font}"/>'
+    '</a:rPr><a:t>{text}</a:t></a:r></a:p>'
+)
+
+
+def song_slides(path):
+    """Returns the non-empty text lines of every slide of a .pptx song, slide by slide."""
+    pkg = Package(path)
+    slides = []
+    for name in pkg.slide_names():
+        lines = []
+        for para in paragraph_texts(pkg.read_text(name)):
+            lines.extend(line.strip() for line in para.split("\n") if line.strip())
+        if lines:
+            slides.append(lines)
+    return slides
+
+
+def build_sequence(songs_before, songs_after, worship_title, bible_title, bible_range, bible_parts, sermon_title="",
+                   read_slides=song_slides):
+    """
+    The slide order of the main deck, as text only: [{"section", "title", "lines"}, ...].
+    read_slides(path) gives the lines of a song slide by slide (song_slides or a cached copy).
+    """
+    sequence = [{"section": "title", "title": worship_title, "lines": [l for l in (worship_title, bible_title) if l]}]
+
+    def add_songs(paths, section):
+        for path in paths:
+            title = os.path.splitext(os.path.basename(path))[0]
+            for lines in read_slides(path):
+                sequence.append({"section": section, "title": title, "lines": lines})
+
+    add_songs(songs_before, "song_before")
+    if bible_title:
+        sequence.append({"section": "bible_title", "title": bible_title, "lines": [bible_title]})
+    for part in bible_parts:
+        lines = [bible_range] + [l.strip() for l in part.splitlines() if l.strip()]
+        sequence.append({"section": "bible_body", "title": bible_range, "lines": [l for l in lines if l]})
+    if sermon_title:
+        sequence.append({"section": "sermon", "title": sermon_title, "lines": [sermon_title]})
+    add_songs(songs_after, "song_after")
+    return sequence
+
+
+def write_companion_pptx(path, sequence):
+    margin = SLIDE_WIDTH // 20
+    parts = {}
+    slide_names = ["ppt/slides/slide{}.xml".format(i) for i in range(1, len(sequence) + 1)]
+
+    overrides = [
+        ("/ppt/presentation.xml", _CT_PML + ".presentation.main+xml"),
+        ("/ppt/slideMasters/slideMaster1.xml", _CT_PML + ".slideMaster+xml"),
+        ("/ppt/slideLayouts/slideLayout1.xml", _CT_PML + ".slideLayout+xml"),
+        ("/ppt/theme/theme1.xml", "application/vnd.openxmlformats-officedocument.theme+xml"),
+    ] + [("/" + name, _CT_PML + ".slide+xml") for name in slide_names]
+    parts["[Content_Types].xml"] = (
+        _XML_DECL + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        + "".join('<Override PartName="{}" ContentType="{}"/>'.format(n, t) for n, t in overrides) + '</Types>'
+    )
+
+    def rels(*entries):
+        return (_XML_DECL + '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                + "".join('<Relationship Id="{}" Type="{}/{}" Target="{}"/>'.format(*e) for e in entries)
+                + '</Relationships>')
+
+    parts["_rels/.rels"] = rels(("rId1", _REL_NS, "officeDocument", "ppt/presentation.xml"))
+    parts["ppt/presentation.xml"] = (
+        _XML_DECL + '<p:presentation ' + _NS + '>'
+        '<p:sldMasterIdLst><p:sldMasterId id="2147483648" r:id="rId1"/></p:sldMasterIdLst>'
+        '<p:sldIdLst>' + "".join('<p:sldId id="{}" r:id="rId{}"/>'.format(256 + i, i + 3)
+                                 for i in range(len(slide_names))) + '</p:sldIdLst>'
+        '<p:sldSz cx="{}" cy="{}"/><p:notesSz cx="6858000" cy="9144000"/></p:presentation>'.format(SLIDE_WIDTH, SLIDE_HEIGHT)
+    )
+    parts["ppt/_rels/presentation.xml.rels"] = rels(
+        ("rId1", _REL_NS, "slideMaster", "slideMasters/slideMaster1.xml"),
+        ("rId2", _REL_NS, "theme", "theme/theme1.xml"),
+        *[("rId{}".format(i + 3), _REL_NS, "slide", "slides/slide{}.xml".format(i + 1)) for i in range(len(slide_names))]
+    )
+    parts["ppt/slideMasters/slideMaster1.xml"] = _MASTER
+    parts["ppt/slideMasters/_rels/slideMaster1.xml.rels"] = rels(
+        ("rId1", _REL_NS, "slideLayout", "../slideLayouts/slideLayout1.xml"),
+        ("rId2", _REL_NS, "theme", "../theme/theme1.xml"))
+    parts["ppt/slideLayouts/slideLayout1.xml"] = _LAYOUT
+    parts["ppt/slideLayouts/_rels/slideLayout1.xml.rels"] = rels(
+        ("rId1", _REL_NS, "slideMaster", "../slideMasters/slideMaster1.xml"))
+    parts["ppt/theme/theme1.xml"] = _THEME
+
+    layout_rels = rels(("rId1", _REL_NS, "slideLayout", "../slideLayouts/slideLayout1.xml"))
+    for name, entry in zip(slide_names, sequence):
+        paras = "".join(_PARAGRAPH.format(sz=FONT_SIZE, font=FONT_FACE, text=xml_text(line)) for line in entry["lines"])
+        box = _TEXT_BOX.format(x=margin, y=margin, cx=SLIDE_WIDTH - 2 * margin, cy=SLIDE_HEIGHT - 2 * margin, paras=paras)
+        parts[name] = _SLIDE.format(box)
+        parts["ppt/slides/_rels/" + name.rsplit("/", 1)[1] + ".rels"] = layout_rels
+
+    write_package(path, parts)
+
+
+def companion_paths(output_path):
+    base = os.path.splitext(os.path.abspath(output_path))[0] + "_lyrics"
+    return base + ".pptx", base + ".json", base + ".txt"
+
+
+def write_companion(output_path, songs_before, songs_after, worship_title, bible_title, bible_range, bible_parts, sermon_title="",
+                    read_slides=song_slides):
+    """
+    Writes '<output>_lyrics.pptx', '.json' and '.txt' next to the main deck.
+    Songs must be .pptx (generate_ppt passes the converted paths). Returns the .pptx path.
+    """
+    sequence = build_sequence(songs_before, songs_after, worship_title, bible_title, bible_range, bible_parts, sermon_title,
+                              read_slides)
+    pptx_path, json_path, txt_path = companion_paths(output_path)
+
+    write_companion_pptx(pptx_path, sequence)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"slides": sequence}, f, ensure_ascii=False, indent=1)
+    with open(txt_path, "w", encoding="utf-8") as f:
+        for i, entry in enumerate(sequence, 1):
+            f.write(f"[{i}] {entry['section']}: {entry['title']}\n")
+            f.write("\n".join(entry["lines"]) + "\n\n")
+    return pptx_path
@@ -2,12 +2,19 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
 import os
 import threading
-import pythoncom
-from main import generate_ppt
+import multiprocessing
+from com_watchdog import run_supervised, prestart_worker
+from scheduler import GenerationScheduler
+from song_fingerprint import find_duplicate_songs
+from prepare import Preparer
+from setlist import build_matcher, match_setlist, MIN_SCORE
 
 import datetime
 
 class App:
+    PREPARE_POLL_MS = 500
+    PREPARE_DELAY_MS = 1500
+
     def __init__(self, root):
         self.root = root
         self.root.title("PPT Automation Tool")
@@ -29,7 +36,15 @@ class App:
         self.template_path_var = tk.StringVar(value=r"D:\02. 열띰!\02. 교회\03. 금요기도회 PPT\friday.pptx")
         
         self.is_wednesday_var = tk.BooleanVar(value=False)
+        self.companion_var = tk.BooleanVar(value=False)
         self.sermon_title_var = tk.StringVar(value="")
+
+        # Duplicate songs in the folder ("곡.pptx" / "곡 (1).pptx"): flagged in the lists or hidden
+        self.hide_duplicates_var = tk.BooleanVar(value=False)
+        self.duplicates_var = tk.StringVar(value="")
+        self.duplicate_of = {}  # duplicate file name -> file name to prefer
+        self.duplicate_folder = None  # Folder duplicate_of was found in
+        self.duplicate_scan = 0  # Number of the latest background scan; older results are dropped
         
         self.bible_title_var = tk.StringVar(value="")
         # self.bible_range_var removed as requested
@@ -42,8 +57,21 @@ class App:
         # 3) Output File -> D:\02. 열띰!\02. 교회\03. 금요기도회 PPT
         self.output_path_var = tk.StringVar(value=os.path.join(r"D:\02. 열띰!\02. 교회\03. 금요기도회 PPT", default_filename))
         
+        # One generation per output file; repeated clicks are coalesced or queued
+        self.status_var = tk.StringVar(value="Idle")
+        self.scheduler = GenerationScheduler(self.run_logic, on_status=self.update_status)
+
+        # Background preparation (warm worker, preflight, template tokens, songs) once
+        # the inputs have not changed for PREPARE_DELAY_MS, so the click only assembles
+        self.prepare_var = tk.StringVar(value="")
+        self.preparer = Preparer(on_status=lambda text: self.root.after(0, self.prepare_var.set, text),
+                                 prestart=prestart_worker)
+        self.last_inputs = None
+        self.inputs_changed_at = None
+
         # UI Elements
         self.create_widgets()
+        self.root.after(self.PREPARE_POLL_MS, self.poll_inputs)
         
         # Initial population - Removed as requested
         # self.populate_song_lists()
@@ -91,8 +119,15 @@ class App:
         frame_tools.pack(fill="x", pady=(0, 10))
         tk.Button(frame_tools, text="Refresh", command=self.populate_song_lists).pack(side="left", fill="x", expand=True, padx=2)
         tk.Button(frame_tools, text="Delete All", command=self.clear_all_lists).pack(side="left", fill="x", expand=True, padx=2)
+        tk.Button(frame_tools, text="Paste Setlist", command=self.open_setlist_dialog).pack(side="left", fill="x", expand=True, padx=2)
         tk.Button(frame_tools, text="FIX PPT", command=self.reset_powerpoint, bg="#ffcccc").pack(side="left", fill="x", expand=True, padx=2)
 
+        frame_dups = tk.Frame(left_frame)
+        frame_dups.pack(fill="x", pady=(0, 10))
+        tk.Checkbutton(frame_dups, text="Hide duplicate songs", variable=self.hide_duplicates_var,
+                       command=self.populate_song_lists).pack(side="left")
+        tk.Label(frame_dups, textvariable=self.duplicates_var, anchor="w", fg="#b35900").pack(side="left", fill="x", expand=True)
+
         # 2. Template & Mode
         tk.Label(left_frame, text="Template & Mode:", font=("Arial", 10, "bold")).pack(anchor="w", pady=(0, 2))
         
@@ -186,9 +221,15 @@ class App:
             return "break"
         self.bible_body_text.bind("<Tab>", focus_next_widget)
 
+        # Lyrics-only companion deck (livestream / confidence monitor)
+        tk.Checkbutton(right_frame, text="Also create lyrics-only deck (_lyrics.pptx / .json / .txt)",
+                       variable=self.companion_var).pack(anchor="w", pady=(0, 5))
+
         # 5. Generate Button
         btn_gen = tk.Button(right_frame, text="Generate PPT", command=self.start_generation, bg="lightblue", font=("Arial", 12, "bold"), height=2)
         btn_gen.pack(fill="x", pady=(0, 0))
+        tk.Label(right_frame, textvariable=self.status_var, anchor="w", fg="gray30").pack(fill="x", pady=(2, 0))
+        tk.Label(right_frame, textvariable=self.prepare_var, anchor="w", fg="gray50").pack(fill="x")
 
     def toggle_mode(self):
         """Switches template filename, output directory, and output filename based on checkbox"""
@@ -273,18 +314,199 @@ class App:
         ppt_dir = self.ppt_dir_var.get()
         self.list_before.delete(0, tk.END)
         self.list_after.delete(0, tk.END)
+        self.duplicate_scan += 1  # A scan still running for the old lists is ignored
+        if ppt_dir != self.duplicate_folder:
+            self.duplicate_of = {}
+            self.duplicates_var.set("")
         
         if os.path.exists(ppt_dir):
             # STRICTLY filter only .pptx (case insensitive)
             files = [f for f in os.listdir(ppt_dir) if f.lower().endswith('.pptx') and not f.startswith("~$")]
             files.sort()
+
+            # Same song saved twice (or a .ppt converted next to its .pptx copy). Reading a
+            # large folder takes a while, so the lists are filled now (with the last result
+            # for this folder) and flagged again when the scan is done.
+            self.start_duplicate_scan(ppt_dir, files)
+            if self.hide_duplicates_var.get():
+                files = [f for f in files if f not in self.duplicate_of]
             
             # Default split: First 2 to Before, Rest to After
             for i, f in enumerate(files):
                 if i < 2:
-                    self.list_before.insert(tk.END, f)
+                    self.insert_song(self.list_before, tk.END, f)
                 else:
-                    self.list_after.insert(tk.END, f)
+                    self.insert_song(self.list_after, tk.END, f)
+
+    def start_duplicate_scan(self, ppt_dir, files):
+        """Fingerprints the folder on a worker thread; show_duplicates gets the result on the Tk thread."""
+        scan = self.duplicate_scan
+        if not self.duplicate_of:
+            self.duplicates_var.set("Checking for duplicate songs...")
+
+        def worker():
+            try:
+                groups = find_duplicate_songs(ppt_dir, files)
+            except Exception as e:
+                print(f"Warning: Duplicate check failed: {e}")
+                groups = []
+            self.root.after(0, self.show_duplicates, scan, ppt_dir, groups)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def show_duplicates(self, scan, ppt_dir, groups):
+        """Flags (or hides) duplicates in both lists, keeping any reordering done meanwhile."""
+        if scan != self.duplicate_scan:
+            return  # The lists were refreshed again since this scan started
+        self.duplicate_folder = ppt_dir
+        self.duplicate_of = {d: g["keep"] for g in groups for d in g["duplicates"]}
+        if self.duplicate_of:
+            names = ", ".join(f"{d} = {k}" for d, k in self.duplicate_of.items())
+            self.duplicates_var.set(f"{len(self.duplicate_of)} duplicate(s): {names}")
+        else:
+            self.duplicates_var.set("")
+        hide = self.hide_duplicates_var.get()
+        for listbox in (self.list_before, self.list_after):
+            for position in reversed(range(listbox.size())):
+                if listbox.get(position) not in self.duplicate_of:
+                    listbox.itemconfig(position, fg="", bg="")
+                elif hide:
+                    listbox.delete(position)
+                else:
+                    listbox.itemconfig(position, fg="#b35900", bg="#fff0d9")
+
+    def open_setlist_dialog(self):
+        """Matches a pasted setlist against the song folder and fills both lists in order."""
+        ppt_dir = self.ppt_dir_var.get()
+        if not os.path.isdir(ppt_dir):
+            messagebox.showerror("Error", "Please choose the PPT folder (songs) first.")
+            return
+        files = sorted(f for f in os.listdir(ppt_dir) if f.lower().endswith('.pptx') and not f.startswith("~$"))
+        if self.hide_duplicates_var.get():
+            files = [f for f in files if f not in self.duplicate_of]
+        try:
+            matcher = build_matcher(ppt_dir, files)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not index the song folder:\n{e}")
+            return
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Paste Setlist")
+        dialog.geometry("760x600")
+        dialog.transient(self.root)
+
+        tk.Label(dialog, text="Setlist (one song per line or \"1. ... 2. ...\"; a '---' line starts the songs after the sermon):").pack(anchor="w", padx=10, pady=(10, 2))
+        setlist_text = scrolledtext.ScrolledText(dialog, height=8, undo=True)
+        setlist_text.pack(fill="x", padx=10)
+        try:
+            setlist_text.insert("1.0", self.root.clipboard_get())
+        except tk.TclError:
+            pass  # Empty clipboard
+
+        tk.Label(dialog, text="Matches (confidence):").pack(anchor="w", padx=10, pady=(10, 2))
+        results_list = tk.Listbox(dialog, height=12)
+        results_list.pack(fill="both", expand=True, padx=10)
+        tk.Label(dialog, text="Alternatives for the selected line (double-click to use):").pack(anchor="w", padx=10, pady=(10, 2))
+        alt_list = tk.Listbox(dialog, height=4)
+        alt_list.pack(fill="x", padx=10)
+
+        rows = []  # per line of results_list: (section, result) or None for a heading
+
+        def describe(result):
+            if result["match"] is None:
+                return f"{result['query']}  ->  (no match)"
+            return f"{result['query']}  ->  {result['match']}  ({result['score']:.0%})"
+
+        def show_row(index):
+            result = rows[index][1]
+            results_list.delete(index)
+            results_list.insert(index, describe(result))
+            if result["match"] is None:
+                results_list.itemconfig(index, fg="red")
+            elif result["score"] < 0.8:
+                results_list.itemconfig(index, fg="#b35900")
+
+        def show_matches(event=None):
+            before, after = match_setlist(matcher, setlist_text.get("1.0", "end-1c"))
+            rows.clear()
+            results_list.delete(0, tk.END)
+            alt_list.delete(0, tk.END)
+            for section, results in (("before", before), ("after", after)):
+                if not results:
+                    continue
+                rows.append(None)
+                results_list.insert(tk.END, f"--- Songs {section.capitalize()} Sermon ---")
+                for result in results:
+                    rows.append((section, result))
+                    results_list.insert(tk.END, "")
+                    show_row(len(rows) - 1)
+
+        def selected_row():
+            selection = results_list.curselection()
+            if selection and rows[selection[0]]:
+                return selection[0]
+            return None
+
+        def show_alternatives(event=None):
+            index = selected_row()
+            if index is None:
+                return
+            alt_list.delete(0, tk.END)
+            for name, score in rows[index][1]["alternatives"]:
+                alt_list.insert(tk.END, f"{name}  ({score:.0%})")
+            alt_list.insert(tk.END, "(skip this song)")
+
+        def use_alternative(event=None):
+            index = selected_row()
+            choice = alt_list.curselection()
+            if index is None or not choice:
+                return
+            result = rows[index][1]
+            previous = [(result["match"], result["score"])] if result["match"] else []
+            if choice[0] < len(result["alternatives"]):
+                result["match"], result["score"] = result["alternatives"].pop(choice[0])
+            else:
+                result["match"], result["score"] = None, 0.0
+            result["alternatives"] = previous + result["alternatives"]
+            show_row(index)
+            results_list.selection_set(index)
+            show_alternatives()
+
+        def apply():
+            self.list_before.delete(0, tk.END)
+            self.list_after.delete(0, tk.END)
+            skipped = 0
+            for row in rows:
+                if row is None:
+                    continue
+                section, result = row
+                if result["match"] is None:
+                    skipped += 1
+                    continue
+                self.insert_song(self.list_before if section == "before" else self.list_after, tk.END, result["match"])
+            if skipped:
+                self.status_var.set(f"Setlist applied, {skipped} song(s) without a match were left out")
+            dialog.destroy()
+
+        setlist_text.bind("<KeyRelease>", show_matches)
+        setlist_text.bind("<<Paste>>", lambda e: dialog.after(1, show_matches))
+        results_list.bind("<<ListboxSelect>>", show_alternatives)
+        alt_list.bind("<Double-Button-1>", use_alternative)
+
+        frame_buttons = tk.Frame(dialog)
+        frame_buttons.pack(fill="x", padx=10, pady=10)
+        tk.Button(frame_buttons, text="Apply to Song Lists", command=apply, bg="lightblue").pack(side="right", padx=2)
+        tk.Button(frame_buttons, text="Cancel", command=dialog.destroy).pack(side="right", padx=2)
+        tk.Label(frame_buttons, text=f"{len(files)} songs indexed; below {MIN_SCORE:.0%} a line counts as unmatched",
+                 fg="gray30").pack(side="left")
+        show_matches()
+
+    def insert_song(self, listbox, index, name):
+        """Inserts a song file name, highlighting it when it duplicates another song."""
+        listbox.insert(index, name)
+        if name in self.duplicate_of:
+            position = listbox.size() - 1 if index == tk.END else index
+            listbox.itemconfig(position, fg="#b35900", bg="#fff0d9")
 
     def move_up(self, listbox):
         try:
@@ -303,7 +525,7 @@ class App:
                 if index > 0:
                     text = listbox.get(index)
                     listbox.delete(index)
-                    listbox.insert(index - 1, text)
+                    self.insert_song(listbox, index - 1, text)
                     listbox.selection_set(index - 1)
         except Exception:
             pass
@@ -321,7 +543,7 @@ class App:
                 if index < listbox.size() - 1:
                     text = listbox.get(index)
                     listbox.delete(index)
-                    listbox.insert(index + 1, text)
+                    self.insert_song(listbox, index + 1, text)
                     listbox.selection_set(index + 1)
         except Exception:
             pass
@@ -362,7 +584,7 @@ class App:
             # So we should insert in reverse order of appearance in 'items' to preserve order at top.
             
             for item in reversed(items):
-                self.list_after.insert(0, item)
+                self.insert_song(self.list_after, 0, item)
                 self.list_after.selection_set(0)
                 
         except Exception:
@@ -383,7 +605,7 @@ class App:
                 
             # Insert into target (at bottom)
             for item in items:
-                self.list_before.insert(tk.END, item)
+                self.insert_song(self.list_before, tk.END, item)
                 self.list_before.selection_set(tk.END)
                 
         except Exception:
@@ -412,8 +634,8 @@ class App:
                 path += ".pptx"
             self.output_path_var.set(os.path.normpath(path))
 
-    def start_generation(self):
-        # Gather inputs
+    def collect_inputs(self):
+        """generate_ppt arguments (songs_before ... sermon_title) from the current widgets."""
         ppt_dir = self.ppt_dir_var.get()
         template_path = self.template_path_var.get()
         output_path = self.output_path_var.get()
@@ -430,14 +652,46 @@ class App:
         songs_before = [os.path.join(ppt_dir, f) for f in files_before]
         songs_after = [os.path.join(ppt_dir, f) for f in files_after]
         
-        # Run in a separate thread
         # Pass bible_title for both title and range arguments
-        threading.Thread(target=self.run_logic, args=(songs_before, songs_after, template_path, output_path, worship_title, bible_title, bible_title, bible_body, sermon_title)).start()
+        return (songs_before, songs_after, template_path, output_path, worship_title, bible_title, bible_title, bible_body, sermon_title)
+
+    def poll_inputs(self):
+        # Prepare once the inputs have been stable for PREPARE_DELAY_MS (any edit restarts the wait)
+        inputs = self.collect_inputs()
+        now = datetime.datetime.now()
+        if inputs != self.last_inputs:
+            self.last_inputs = inputs
+            self.inputs_changed_at = now
+            if inputs[0] or inputs[1]:
+                self.prepare_var.set("Inputs changed...")
+        elif self.inputs_changed_at and (now - self.inputs_changed_at).total_seconds() * 1000 >= self.PREPARE_DELAY_MS:
+            self.inputs_changed_at = None
+            if inputs[0] or inputs[1]:
+                self.preparer.update(inputs)
+            else:
+                self.prepare_var.set("")
+        self.root.after(self.PREPARE_POLL_MS, self.poll_inputs)
 
-    def run_logic(self, songs_before, songs_after, template_path, output_path, worship_title, bible_title, bible_range, bible_body, sermon_title=""):
-        pythoncom.CoInitialize()
+    def start_generation(self):
+        # Run in a separate thread (via the scheduler: one job per output file)
+        inputs = self.collect_inputs()
+        output_path = inputs[3]
+        args = inputs + (self.companion_var.get(),)
+        result = self.scheduler.submit(output_path, args)
+        if result == GenerationScheduler.COALESCED:
+            self.status_var.set(self.scheduler.status_text() + " (same request already scheduled)")
+        elif result in (GenerationScheduler.QUEUED, GenerationScheduler.SUPERSEDED):
+            self.status_var.set(self.scheduler.status_text() + " (will run after the current job)")
+
+    def update_status(self, text):
+        # Called from worker threads; Tk variables must be touched on the main thread
+        self.root.after(0, self.status_var.set, text)
+
+    def run_logic(self, songs_before, songs_after, template_path, output_path, worship_title, bible_title, bible_range, bible_body, sermon_title="", companion=False):
         try:
-            errors, warnings = generate_ppt(songs_before, songs_after, template_path, output_path, worship_title, bible_title, bible_range, bible_body, sermon_title)
+            # PowerPoint is driven from a supervised worker process, so a hung COM call
+            # is killed and retried instead of freezing this thread forever
+            errors, warnings = run_supervised((songs_before, songs_after, template_path, output_path, worship_title, bible_title, bible_range, bible_body, sermon_title), {"companion": companion})
             
             msg = ""
             if errors:
@@ -466,6 +720,8 @@ class App:
             messagebox.showerror("Error", f"An critical error occurred:\n{e}")
 
 if __name__ == "__main__":
+    # Required for the watchdog worker process in the PyInstaller build
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = App(root)
     root.mainloop()
@@ -0,0 +1,244 @@
+"""
+Deck inspector that reads the .pptx package directly (no PowerPoint, runs anywhere).
+
+Prints slide count, each slide's layout and master, shape names with Top/Left (in
+points, like the COM properties) and text, plus media sizes, master/layout usage and
+duplicated parts. Replaces the old debug_count.py, debug_slides.py and verify_result.py.
+
+Usage: python inspect_deck.py [deck.pptx ...] [--json]
+       (default: result_friday.pptx next to this script)
+"""
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+from ooxml import Package, parse_attrs, paragraph_texts, RT_SLIDE_LAYOUT, RT_SLIDE_MASTER, RT_THEME
+from compaction import fingerprint_parts
+
+EMU_PER_POINT = 12700
+
+_CNVPR_RE = re.compile(r"<p:cNvPr\s[^>]*?/?>")
+_OFF_RE = re.compile(r"<a:off\s[^>]*?/>")
+_PH_RE = re.compile(r"<p:ph\b[^>]*?/?>")
+_CSLD_RE = re.compile(r"<p:cSld\b[^>]*>")
+_REL_ATTR_RE = re.compile(r'r:(?:embed|link|id)="([^"]*)"')
+
+
+def _shape_segments(xml):
+    """Splits a slide/layout XML into one chunk per shape (from its cNvPr up to the next one)."""
+    # The first cNvPr belongs to the shape tree itself
+    starts = [m.start() for m in _CNVPR_RE.finditer(xml)][1:]
+    return [xml[a:b] for a, b in zip(starts, starts[1:] + [len(xml)])]
+
+
+def _placeholder_key(segment):
+    m = _PH_RE.search(segment)
+    if not m:
+        return None
+    attrs = parse_attrs(m.group(0))
+    return attrs.get("type", "body"), attrs.get("idx", "0")
+
+
+def _placeholder_offsets(xml):
+    """{(type, idx): (top, left)} for placeholders that carry their own position."""
+    offsets = {}
+    for segment in _shape_segments(xml):
+        key = _placeholder_key(segment)
+        off = _OFF_RE.search(segment)
+        if key and off:
+            attrs = parse_attrs(off.group(0))
+            offsets.setdefault(key, (int(attrs["y"]) / EMU_PER_POINT, int(attrs["x"]) / EMU_PER_POINT))
+    return offsets
+
+
+def _find_inherited(key, *offset_maps):
+    """Placeholder position from the layout, then the master (matched by idx, then by type)."""
+    for offsets in offset_maps:
+        if key in offsets:
+            return offsets[key]
+        for (ph_type, _), value in offsets.items():
+            if ph_type == key[0]:
+                return value
+    return None
+
+
+def _part_name(pkg, part):
+    m = _CSLD_RE.search(pkg.read_text(part))
+    return parse_attrs(m.group(0)).get("name", "") if m else ""
+
+
+def _rel_target(pkg, part, rel_type):
+    return next((r.target for r in pkg.rels(part) if r.rel_type == rel_type), None)
+
+
+def inspect_deck(path):
+    """Returns a dict describing the deck (slides, shapes, masters, media, duplicates)."""
+    pkg = Package(path)
+    slides = pkg.slide_names()
+    offsets_cache = {}
+
+    def offsets_of(part):
+        if part and part not in offsets_cache:
+            offsets_cache[part] = _placeholder_offsets(pkg.read_text(part))
+        return offsets_cache.get(part, {})
+
+    slide_info = []
+    layout_usage = {}
+    media_usage = {}
+    for index, slide in enumerate(slides, 1):
+        layout = _rel_target(pkg, slide, RT_SLIDE_LAYOUT)
+        master = _rel_target(pkg, layout, RT_SLIDE_MASTER) if layout else None
+        layout_usage[layout] = layout_usage.get(layout, 0) + 1
+
+        xml = pkg.read_text(slide)
+        shapes = []
+        for segment in _shape_segments(xml):
+            attrs = parse_attrs(_CNVPR_RE.match(segment).group(0))
+            off = _OFF_RE.search(segment)
+            top = left = None
+            if off:
+                off_attrs = parse_attrs(off.group(0))
+                top, left = int(off_attrs["y"]) / EMU_PER_POINT, int(off_attrs["x"]) / EMU_PER_POINT
+            else:
+                key = _placeholder_key(segment)
+                inherited = _find_inherited(key, offsets_of(layout), offsets_of(master)) if key else None
+                if inherited:
+                    top, left = inherited
+            has_text = "<p:txBody" in segment
+            shapes.append({
+                "name": attrs.get("name", ""),
+                "top": top,
+                "left": left,
+                "text": "\r".join(paragraph_texts(segment)) if has_text else None,
+            })
+
+        slide_rels = {r.rid: r for r in pkg.rels(slide)}
+        for rid in set(_REL_ATTR_RE.findall(xml)):
+            rel = slide_rels.get(rid)
+            if rel and not rel.external and rel.target.startswith("ppt/media/"):
+                media_usage.setdefault(rel.target, []).append(index)
+
+        slide_info.append({
+            "index": index,
+            "part": slide,
+            "layout": _part_name(pkg, layout) if layout else None,
+            "layout_part": layout,
+            "master_part": master,
+            "shapes": shapes,
+        })
+
+    masters = []
+    pres = pkg.main_part()
+    for rel in pkg.rels(pres):
+        if rel.rel_type != RT_SLIDE_MASTER or not pkg.has(rel.target):
+            continue
+        layouts = [r.target for r in pkg.rels(rel.target) if r.rel_type == RT_SLIDE_LAYOUT and pkg.has(r.target)]
+        masters.append({
+            "part": rel.target,
+            "name": _part_name(pkg, rel.target),
+            "theme": _rel_target(pkg, rel.target, RT_THEME),
+            "layouts": [{"part": l, "name": _part_name(pkg, l), "slides": layout_usage.get(l, 0)} for l in layouts],
+        })
+
+    media = []
+    for name in pkg.names():
+        if name.startswith("ppt/media/"):
+            info = pkg.info(name)
+            media.append({"part": name, "size": info.file_size, "compressed": info.compress_size,
+                          "slides": media_usage.get(name, [])})
+
+    # Byte-identical parts, plus masters/layouts/themes that only differ in ids
+    groups = {}
+    for name in pkg.names():
+        if not name.endswith(".rels") and name != "[Content_Types].xml":
+            groups.setdefault("bytes:" + hashlib.sha1(pkg.read(name)).hexdigest(), []).append(name)
+    structural = [n for n in pkg.names() if n.startswith(("ppt/slideMasters/", "ppt/slideLayouts/", "ppt/theme/"))
+                  and n.endswith(".xml")]
+    for name, digest in fingerprint_parts(pkg, structural).items():
+        groups.setdefault("xml:" + digest, []).append(name)
+    duplicates = []
+    for key, names in groups.items():
+        if len(names) > 1 and sorted(names) not in [d["parts"] for d in duplicates]:
+            duplicates.append({"kind": "identical" if key.startswith("bytes:") else "equivalent",
+                               "parts": sorted(names)})
+
+    return {
+        "path": os.path.abspath(path),
+        "size": os.path.getsize(path),
+        "slide_count": len(slides),
+        "slides": slide_info,
+        "masters": masters,
+        "media": media,
+        "duplicates": duplicates,
+    }
+
+
+def _fmt_pos(value):
+    return "inherited" if value is None else f"{value:g}"
+
+
+def format_report(info):
+    lines = [f"Analyzing: {info['path']} ({info['size']:,} bytes)",
+             f"Total Slides: {info['slide_count']}"]
+    for slide in info["slides"]:
+        lines.append("")
+        lines.append(f"--- Slide {slide['index']} ({slide['part']}) ---")
+        lines.append(f"  Layout: {slide['layout']} [{slide['layout_part']}], master {slide['master_part']}")
+        text_shapes = []
+        for shape in slide["shapes"]:
+            line = f"  Shape: {shape['name']}, Top: {_fmt_pos(shape['top'])}, Left: {_fmt_pos(shape['left'])}"
+            if shape["text"] is not None:
+                line += f", Text: {shape['text']!r}"
+                text_shapes.append(shape)
+            lines.append(line)
+        positioned = [s for s in text_shapes if s["top"] is not None]
+        if positioned:
+            bottom = max(positioned, key=lambda s: s["top"])
+            lines.append(f"  -> Bottom-most text shape: {bottom['name']} (Text: {bottom['text']!r})")
+
+    lines.append("")
+    lines.append("Masters and layouts (slides using each layout):")
+    for master in info["masters"]:
+        used = sum(l["slides"] for l in master["layouts"])
+        lines.append(f"  {master['part']} '{master['name']}' theme {master['theme']} - {used} slide(s)")
+        for layout in master["layouts"]:
+            lines.append(f"    {layout['slides']:>3}  {layout['part']} '{layout['name']}'")
+
+    lines.append("")
+    lines.append(f"Media ({len(info['media'])}):")
+    for item in sorted(info["media"], key=lambda m: m["size"], reverse=True):
+        slides = ", ".join(map(str, item["slides"])) or "-"
+        lines.append(f"  {item['size']:>12,}  {item['part']} (slides: {slides})")
+
+    lines.append("")
+    lines.append(f"Duplicated parts ({len(info['duplicates'])}):")
+    for group in info["duplicates"]:
+        lines.append(f"  {group['kind']}: {', '.join(group['parts'])}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect .pptx decks without PowerPoint.")
+    parser.add_argument("decks", nargs="*", help="decks to inspect (default: result_friday.pptx)")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of text")
+    args = parser.parse_args(argv)
+
+    decks = args.decks or [os.path.join(os.path.dirname(os.path.abspath(__file__)), "result_friday.pptx")]
+    results = []
+    for path in decks:
+        if not os.path.exists(path):
+            print(f"File not found: {path}", file=sys.stderr)
+            return 1
+        results.append(inspect_deck(path))
+
+    if args.json:
+        print(json.dumps(results if len(results) > 1 else results[0], ensure_ascii=False, indent=1))
+    else:
+        print("\n\n".join(format_report(info) for info in results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,19 +3,41 @@ import os
 import time
 import pythoncom
 import traceback
+import contextlib
+from template_tokens import token_values_for
+from prepare import prepare_template, cached_song_slides
+from preflight import run_preflight
+from com_profiler import profiler_from_env
+from companion import write_companion
+from compaction import compact_deck
+from pipeline import Pipeline, Stage, PipelineAbort
+from service_order import BIBLE_BODY_SLIDE, paginate_bible_slides, arrange_before_sermon, arrange_after_sermon
+from checkpoint import (Checkpoint, inputs_key, PHASE_CONVERTED, PHASE_TEMPLATE,
+                        PHASE_SONGS_BEFORE, PHASE_BIBLE_BREAK)
 
 class PowerPointManager:
     """
     Context manager to ensure PowerPoint application is properly closed.
     Prevents 'File in use' and 'Server execution failed' errors by handling cleanup.
     """
-    def __init__(self):
+    def __init__(self, watchdog=None, profiler=None):
         self.app = None
         self.presentations = []
+        # Optional com_watchdog.WatchdogReporter when running in a supervised worker process
+        self.watchdog = watchdog
+        # Optional com_profiler.ComProfiler: every object handed out is then a recording proxy
+        self.profiler = profiler
 
     def __enter__(self):
         try:
-            self.app = win32com.client.Dispatch("PowerPoint.Application")
+            if self.watchdog:
+                self.watchdog.before_dispatch()
+            with self.operation("Dispatch"):
+                self.app = win32com.client.Dispatch("PowerPoint.Application")
+            if self.profiler:
+                self.app = self.profiler.wrap(self.app, "Application")
+            if self.watchdog:
+                self.watchdog.attach(self.app)
             self.app.Visible = True
             return self
         except Exception as e:
@@ -33,18 +55,20 @@ class PowerPointManager:
         # Quit Application
         if self.app:
             try:
-                self.app.Quit()
+                with self.operation("Quit"):
+                    self.app.Quit()
             except:
                 pass
         
         # Release COM object
         self.app = None
 
-    def open_presentation(self, path):
+    def open_presentation(self, path, read_only=False):
         if not self.app:
             raise Exception("PowerPoint app is not initialized.")
         try:
-            pres = self.app.Presentations.Open(path)
+            with self.operation("Presentations.Open", os.path.basename(path)):
+                pres = self.app.Presentations.Open(path, read_only)
             self.presentations.append(pres)
             return pres
         except Exception as e:
@@ -59,6 +83,17 @@ class PowerPointManager:
                 pass
             self.presentations.remove(pres)
 
+    def operation(self, name, detail=""):
+        """Marks a COM call that can block, so a supervising watchdog can time it out."""
+        if self.watchdog:
+            return self.watchdog.operation(name, detail)
+        return contextlib.nullcontext()
+
+    def paste(self):
+        """Pastes the clipboard with source formatting after the current selection."""
+        with self.operation("PasteSourceFormatting"):
+            self.app.CommandBars.ExecuteMso("PasteSourceFormatting")
+
 def convert_ppt_to_pptx(ppt_mgr, ppt_path):
     """Converts a .ppt file to .pptx format using the existing PowerPoint manager."""
     pptx_path = ppt_path + "x"
@@ -79,7 +114,8 @@ def convert_ppt_to_pptx(ppt_mgr, ppt_path):
     
     try:
         presentation = ppt_mgr.open_presentation(ppt_path)
-        presentation.SaveAs(pptx_path, 24) # 24 is ppSaveAsOpenXMLPresentation
+        with ppt_mgr.operation("SaveAs", os.path.basename(pptx_path)):
+            presentation.SaveAs(pptx_path, 24) # 24 is ppSaveAsOpenXMLPresentation
         ppt_mgr.close_presentation(presentation)
         print(f"Conversion successful: {pptx_path}")
         return pptx_path
@@ -209,253 +245,398 @@ def setup_sermon_title_slide(slide, title):
     except Exception as e:
         print(f"Error updating Sermon Title slide: {e}")
 
-def generate_ppt(songs_before, songs_after, template_path, output_path, worship_title, bible_title, bible_range, bible_body, sermon_title=""):
+# Song insertion strategies:
+# - "insert_file": Slides.InsertFromFile + reapplying the song's design (no clipboard, no sleeps)
+# - "paste": open each song, copy it and run PasteSourceFormatting (original behaviour)
+INSERT_MODE_FILE = "insert_file"
+INSERT_MODE_PASTE = "paste"
+
+def insert_song_from_file(main_pres, song_path, target_index):
+    """
+    Inserts every slide of song_path after slide target_index with one Slides.InsertFromFile call.
+    InsertFromFile takes the destination design, so the song's own design is loaded and
+    reapplied to the inserted range to keep source formatting. Returns the number of inserted slides.
+    """
+    inserted = main_pres.Slides.InsertFromFile(song_path, target_index)
+    if inserted > 0:
+        design = main_pres.Designs.Load(song_path)
+        for index in range(target_index + 1, target_index + inserted + 1):
+            main_pres.Slides(index).Design = design
+    return inserted
+
+def insert_break_slide(main_pres, break_slide_index, target_index):
+    """Clones the break slide with Duplicate() and moves the copy right after slide target_index."""
+    # Duplicate() puts the copy right after the original, which shifts target_index down by one
+    # when it lies after the break slide. MoveTo(target_index + 1) therefore lands after it.
+    copy = main_pres.Slides(break_slide_index).Duplicate()
+    copy.MoveTo(target_index + 1)
+
+class ComDeck:
+    """The open PowerPoint deck, as the deck object service_order arranges."""
+    def __init__(self, ppt_mgr, pres, insert_mode=INSERT_MODE_FILE):
+        self.ppt_mgr = ppt_mgr
+        self.pres = pres
+        self.insert_mode = insert_mode
+
+    def slide_count(self):
+        return self.pres.Slides.Count
+
+    def insert_song(self, song_path, after):
+        if self.insert_mode == INSERT_MODE_FILE:
+            # One call per song: no extra open/close, clipboard or sleeps
+            with self.ppt_mgr.operation("InsertFromFile", os.path.basename(song_path)):
+                return insert_song_from_file(self.pres, song_path, after)
+
+        # Open song using the manager (so it gets closed properly)
+        song_pres = self.ppt_mgr.open_presentation(song_path)
+        song_slide_count = song_pres.Slides.Count
+        song_pres.Slides.Range().Copy()
+        self.ppt_mgr.close_presentation(song_pres) # Close immediately after copy
+
+        # To paste after slide N, we select slide N.
+        self.pres.Slides(after).Select()
+        self.ppt_mgr.paste()
+        time.sleep(1)
+        return song_slide_count
+
+    def duplicate_slide(self, index, after):
+        insert_break_slide(self.pres, index, after)
+
+def write_profile_report(profiler, output_path):
+    """Prints the COM profile and stores it next to the output as '<name>.com-profile.txt'."""
+    report = profiler.report()
+    print(report)
+    report_path = os.path.splitext(os.path.abspath(output_path))[0] + ".com-profile.txt"
+    try:
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+        print(f"COM profile saved to: {report_path}")
+    except OSError as e:
+        print(f"Warning: Could not save COM profile: {e}")
+
+def writing_path_for(output_path):
+    """Temporary name the deck is written to, in the output folder so the final rename is atomic."""
+    base, ext = os.path.splitext(output_path)
+    return base + ".writing" + ext
+
+def publish_file(tmp_path, final_path):
+    """Flushes tmp_path to disk and renames it over final_path in one step."""
+    with open(tmp_path, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, final_path)
+
+def generate_ppt(songs_before, songs_after, template_path, output_path, worship_title, bible_title, bible_range, bible_body, sermon_title="", insert_mode=INSERT_MODE_FILE, watchdog=None, companion=False):
     print(f"Template Path: {template_path}")
     print(f"Output File: {output_path}")
 
     errors = []
     warnings = []
-    
-    # Verify template exists before starting PowerPoint
-    if not os.path.exists(template_path):
-         msg = f"Template file not found: {template_path}"
-         print(f"Error: {msg}")
-         errors.append(msg)
-         return errors, warnings
-
-    # Use Context Manager for safety
-    try:
-        with PowerPointManager() as ppt_mgr:
-            
-            # Helper to process files (convert .ppt to .pptx)
-            def process_file_list(file_list):
-                processed = []
-                if not file_list:
-                    return processed
+    output_path = os.path.abspath(output_path)
+    # The deck is written once, to this file, and renamed over output_path when complete,
+    # so output_path never holds a half-built deck
+    writing_path = writing_path_for(output_path)
+
+    # Opt-in COM round-trip profiling (PPT_COM_PROFILE=1)
+    profiler = profiler_from_env()
+
+    # The stages below form a graph (see pipeline.py): pure-Python stages run on a thread
+    # pool as soon as their inputs exist, PowerPoint stages run in order on this thread.
+
+    # --- Pure stages ---
+
+    def preflight():
+        # Validate every input before starting PowerPoint so a bad run fails in milliseconds
+        preflight_errors, preflight_warnings = run_preflight(songs_before, songs_after, template_path, output_path, wednesday=bool(sermon_title))
+        for msg in preflight_warnings:
+            print(f"Warning: {msg}")
+        warnings.extend(preflight_warnings)
+        if preflight_errors:
+            for msg in preflight_errors:
+                print(f"Error: {msg}")
+            errors.extend(preflight_errors)
+            raise PipelineAbort()
+
+        # Missing and unsupported songs were already reported by preflight
+        def usable(path):
+            return os.path.exists(path) and path.lower().endswith((".ppt", ".pptx"))
+        return {
+            "preflight_ok": True,
+            "usable_before": [p for p in songs_before if usable(p)],
+            "usable_after": [p for p in songs_after if usable(p)],
+        }
+
+    def make_output_dir(preflight_ok):
+        # Preflight accepts an output folder that does not exist yet. Created before anything
+        # writes there: checkpoints, the final deck and the lyrics-only deck.
+        output_dir = os.path.dirname(output_path)
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
+        return {"output_dir_ready": True}
+
+    def paginate_bible():
+        return {"bible_parts": [part.strip() for part in bible_body.split('/')]}
+
+    def fill_tokens(preflight_ok, bible_parts):
+        # Fill explicit {{tokens}} in one pass over the template XML (usually already
+        # done by the GUI's background preparation, see prepare.py).
+        # Anything not covered by a token falls back to the shape heuristics in setup_template.
+        token_values = token_values_for(worship_title, bible_title, bible_range, bible_parts, sermon_title)
+        filled_tokens = set()
+        working_template_path = template_path
+        try:
+            filled_path, filled_tokens = prepare_template(template_path, token_values, bible_parts)
+            if filled_tokens:
+                working_template_path = filled_path
+                print(f"Filled template tokens: {', '.join(sorted(filled_tokens))}")
+        except Exception as e:
+            msg = f"Could not read template tokens, using shape heuristics: {e}"
+            print(f"Warning: {msg}")
+            warnings.append(msg)
+        return {"working_template": working_template_path, "filled_tokens": filled_tokens}
+
+    def load_checkpoint(usable_before, usable_after):
+        # Checkpoint: a rerun with the same inputs resumes where a crashed run stopped
+        checkpoint = Checkpoint(output_path, inputs_key(
+            [template_path] + list(usable_before) + list(usable_after),
+            [usable_before, usable_after, template_path, output_path, worship_title,
+             bible_title, bible_range, bible_body, sermon_title, insert_mode]))
+        if checkpoint.load():
+            print(f"Resuming from checkpoint (done: {', '.join(checkpoint.get('phases'))})")
+        return {"checkpoint": checkpoint}
+
+    def write_lyrics_deck(output_dir_ready, songs_before_bible, songs_after_bible, bible_parts):
+        # Lyrics-only companion deck from the same (converted) songs and Bible text.
+        # Only reads the song files, so it overlaps with the PowerPoint stages; songs the
+        # background preparation already parsed come from its cache.
+        try:
+            companion_path = write_companion(output_path, songs_before_bible, songs_after_bible, worship_title,
+                                             bible_title, bible_range, bible_parts, sermon_title,
+                                             read_slides=cached_song_slides)
+            print(f"Saved lyrics-only deck to: {companion_path}")
+        except Exception as e:
+            msg = f"Could not create lyrics-only deck: {e}"
+            print(f"Warning: {msg}")
+            warnings.append(msg)
+
+    def compact(written):
+        # Merge the masters/layouts every pasted song brought along (before the deck is published)
+        try:
+            stats = compact_deck(writing_path)
+            print(f"Compacted masters/layouts: {stats}")
+        except Exception as e:
+            msg = f"Could not remove duplicate slide masters: {e}"
+            print(f"Warning: {msg}")
+            warnings.append(msg)
+        return {"compacted": True}
+
+    def publish(checkpoint, compacted, powerpoint_closed):
+        publish_file(writing_path, output_path)
+        print(f"Final save to: {output_path}")
+
+        # The run completed, nothing left to resume
+        checkpoint.clear()
+        return {"published": True}
+
+    # --- PowerPoint stages ---
+
+    powerpoint = contextlib.ExitStack()
+
+    def start_powerpoint(preflight_ok):
+        # Needs nothing but a passed preflight, so launching PowerPoint overlaps with token filling
+        return {"ppt_mgr": powerpoint.enter_context(PowerPointManager(watchdog, profiler))}
+
+    def convert_songs(ppt_mgr, checkpoint, usable_before, usable_after):
+        # Helper to process files (convert .ppt to .pptx)
+        def process_file_list(file_list):
+            processed = []
+            if not file_list:
+                return processed
+                
+            for file_path in file_list:
+                if not os.path.exists(file_path):
+                    msg = f"File not found: {file_path}"
+                    print(f"Warning: {msg}")
+                    warnings.append(msg)
+                    continue
                     
-                for file_path in file_list:
-                    if not os.path.exists(file_path):
-                        msg = f"File not found: {file_path}"
-                        print(f"Warning: {msg}")
-                        warnings.append(msg)
-                        continue
-                        
-                    if file_path.lower().endswith(".ppt"):
-                        # Convert to .pptx using the SAME ppt_mgr instance
-                        try:
-                            converted_path = convert_ppt_to_pptx(ppt_mgr, file_path)
-                            if converted_path:
-                                processed.append(converted_path)
-                        except Exception as e:
-                            msg = f"Failed to convert {os.path.basename(file_path)}: {str(e)}"
-                            print(msg)
-                            errors.append(msg)
-                    elif file_path.lower().endswith(".pptx"):
-                        processed.append(file_path)
-                    else:
-                        msg = f"Skipping unsupported file type: {os.path.basename(file_path)}"
+                if file_path.lower().endswith(".ppt"):
+                    # Convert to .pptx using the SAME ppt_mgr instance
+                    try:
+                        converted_path = convert_ppt_to_pptx(ppt_mgr, file_path)
+                        if converted_path:
+                            processed.append(converted_path)
+                    except Exception as e:
+                        msg = f"Failed to convert {os.path.basename(file_path)}: {str(e)}"
                         print(msg)
-                        warnings.append(msg)
-                return processed
+                        errors.append(msg)
+                elif file_path.lower().endswith(".pptx"):
+                    processed.append(file_path)
+                else:
+                    msg = f"Skipping unsupported file type: {os.path.basename(file_path)}"
+                    print(msg)
+                    warnings.append(msg)
+            return processed
 
+        if checkpoint.done(PHASE_CONVERTED):
+            songs_before_bible = checkpoint.get("songs_before_bible")
+            songs_after_bible = checkpoint.get("songs_after_bible")
+        else:
             print("Processing 'Before Sermon' songs...")
-            songs_before_bible = process_file_list(songs_before)
+            songs_before_bible = process_file_list(usable_before)
             
             print("Processing 'After Sermon' songs...")
-            songs_after_bible = process_file_list(songs_after)
+            songs_after_bible = process_file_list(usable_after)
+        return {"songs_before_bible": songs_before_bible, "songs_after_bible": songs_after_bible}
 
+    def open_deck(ppt_mgr, checkpoint, output_dir_ready, working_template, songs_before_bible, songs_after_bible):
+        if checkpoint.done(PHASE_TEMPLATE):
+            # Continue from the partially built deck
+            print(f"Opening checkpoint deck: {checkpoint.deck_path()}")
+            main_pres = ppt_mgr.open_presentation(checkpoint.deck_path(), read_only=True)
+        else:
             # Open Template
             print(f"Opening template: {template_path}")
-            # We open it as a copy to avoid locking the template, but SaveAs handles this too.
-            # Using Open() is fine as long as we SaveAs immediately.
-            main_pres = ppt_mgr.open_presentation(template_path)
-            
-            # Ensure output directory exists
-            output_path = os.path.abspath(output_path)
-            output_dir = os.path.dirname(output_path)
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir, exist_ok=True)
-            
-            try:
-                main_pres.SaveAs(output_path)
-                print(f"Saved initial copy to: {output_path}")
-            except Exception as e:
-                # If we can't save, it's critical.
-                raise Exception(f"Error saving to {output_path}: {e}")
+            # Read-only: the deck is only ever written with SaveCopyAs, so the template stays untouched
+            main_pres = ppt_mgr.open_presentation(working_template, read_only=True)
 
-            # Basic Validation
-            if main_pres.Slides.Count < 3:
-                raise Exception("Template must have at least 3 slides.")
+        if not checkpoint.done(PHASE_CONVERTED):
+            checkpoint.record(PHASE_CONVERTED, songs_before_bible=songs_before_bible,
+                              songs_after_bible=songs_after_bible)
+        return {"main_pres": main_pres}
 
-            # Update Slide 1: Worship Title
+    def setup_template(ppt_mgr, checkpoint, main_pres, filled_tokens, bible_parts):
+        if checkpoint.done(PHASE_TEMPLATE):
+            return {"template_ready": True}
+        # Basic Validation
+        if main_pres.Slides.Count < 3:
+            raise Exception("Template must have at least 3 slides.")
+
+        # Update Slide 1: Worship Title
+        if "worship_title" not in filled_tokens:
             setup_worship_title(main_pres.Slides(1), worship_title)
-            
-            # Update Slide 1 & 4 with Bible Reference
+    
+        # Update Slide 1 & 4 with Bible Reference
+        if "bible_title" not in filled_tokens:
             setup_bible_slide(main_pres.Slides(1), bible_title)
-            
+        
             if main_pres.Slides.Count >= 4:
                  setup_bible_slide(main_pres.Slides(4), bible_title)
-            
-            # Update Slide 5 with Bible Body (Splitting logic)
-            if main_pres.Slides.Count >= 5:
-                bible_parts = [part.strip() for part in bible_body.split('/')]
-                
-                # Start at Slide 5
-                current_bible_slide_index = 5
-                
-                for i, part in enumerate(bible_parts):
-                    # Always verify the slide exists at the expected index
-                    if current_bible_slide_index > main_pres.Slides.Count:
-                        raise Exception(f"Logic Error: Expected slide at {current_bible_slide_index} but Count is {main_pres.Slides.Count}")
-                        
-                    current_slide = main_pres.Slides(current_bible_slide_index)
-                    
-                    if i == 0:
-                        # First part: modify existing Slide 5
-                        setup_bible_body_slide(current_slide, bible_range, part)
-                    else:
-                        # Subsequent parts: Copy previous slide
-                        main_pres.Slides(current_bible_slide_index).Copy()
-                        
-                        # Paste after current slide
-                        # Note: Paste usually pastes AFTER the current selection or at the end? 
-                        # To be safe, we select the current slide, then Paste.
-                        main_pres.Slides(current_bible_slide_index).Select()
-                        ppt_mgr.app.CommandBars.ExecuteMso("PasteSourceFormatting")
-                        time.sleep(0.5) # Wait for paste
-                        
-                        # The new slide should be at index + 1
-                        current_bible_slide_index += 1
-                        
-                        # Verify we have the new slide
-                        if current_bible_slide_index > main_pres.Slides.Count:
-                             # Wait a bit longer if needed
-                             time.sleep(1)
-                             if current_bible_slide_index > main_pres.Slides.Count:
-                                 raise Exception("Paste failed: New slide not found.")
-
-                        setup_bible_body_slide(main_pres.Slides(current_bible_slide_index), bible_range, part)
+    
+        # Update Slide 5 with Bible Body (Splitting logic)
+        current_bible_slide_index = BIBLE_BODY_SLIDE
+        if "bible_body" in filled_tokens:
+            # Already paginated in the template XML: one slide per part starting at Slide 5
+            current_bible_slide_index = BIBLE_BODY_SLIDE + len(bible_parts) - 1
+        else:
+            # One copy of Slide 5 per part (Duplicate(): no clipboard, no waiting for a paste)
+            body_slides = paginate_bible_slides(ComDeck(ppt_mgr, main_pres, insert_mode), len(bible_parts))
+            if body_slides:
+                for index, part in zip(body_slides, bible_parts):
+                    setup_bible_body_slide(main_pres.Slides(index), bible_range, part)
+                current_bible_slide_index = body_slides[-1]
             else:
                 warnings.append("Warning: Slide 5 not found in template.")
 
-            # Sermon Title Logic (Wednesday Mode)
-            # If sermon_title is provided, we expect a Sermon Slide (Slide 6 original).
-            # Due to Bible splitting (if any), the Sermon Slide is at 'current_bible_slide_index + 1'.
-            if sermon_title:
-                sermon_slide_index = current_bible_slide_index + 1
-                if main_pres.Slides.Count >= sermon_slide_index:
-                    print(f"Updating Sermon Title on Slide {sermon_slide_index}...")
-                    setup_sermon_title_slide(main_pres.Slides(sermon_slide_index), sermon_title)
-                else:
-                    msg = "Wednesday Mode selected but Slide 6 (Sermon Title) not found in template."
-                    print(msg)
-                    warnings.append(msg)
+        # Sermon Title Logic (Wednesday Mode)
+        # If sermon_title is provided, we expect a Sermon Slide (Slide 6 original).
+        # Due to Bible splitting (if any), the Sermon Slide is at 'current_bible_slide_index + 1'.
+        if sermon_title and "sermon_title" not in filled_tokens:
+            sermon_slide_index = current_bible_slide_index + 1
+            if main_pres.Slides.Count >= sermon_slide_index:
+                print(f"Updating Sermon Title on Slide {sermon_slide_index}...")
+                setup_sermon_title_slide(main_pres.Slides(sermon_slide_index), sermon_title)
+            else:
+                msg = "Wednesday Mode selected but Slide 6 (Sermon Title) not found in template."
+                print(msg)
+                warnings.append(msg)
 
-            # --- Songs Insertion Logic ---
-            
-            # Break Slide is originally Slide 3. 
-            # We want to COPY Slide 3 to insert as a break.
-            break_slide_index = 3
-            
-            # 1. Insert BEFORE Bible (After Slide 3)
-            # The insertion point starts after Slide 3
-            current_insert_index = 3
-            
-            def insert_songs_at(songs_list, target_index):
-                nonlocal current_insert_index
-                
-                for song_path in songs_list:
-                    print(f"Inserting song: {os.path.basename(song_path)}")
-                    try:
-                        # Open song using the manager (so it gets closed properly)
-                        song_pres = ppt_mgr.open_presentation(song_path)
-                        song_slide_count = song_pres.Slides.Count
-                        song_pres.Slides.Range().Copy()
-                        ppt_mgr.close_presentation(song_pres) # Close immediately after copy
-                        
-                        # Paste into Main
-                        # We want to paste AFTER 'target_index'
-                        # To paste after slide N, we select slide N.
-                        main_pres.Slides(target_index).Select()
-                        ppt_mgr.app.CommandBars.ExecuteMso("PasteSourceFormatting")
-                        time.sleep(1)
-                        
-                        # Update index: we added N slides
-                        target_index += song_slide_count
-                        
-                        # Insert Break Slide AFTER the song
-                        main_pres.Slides(break_slide_index).Copy()
-                        main_pres.Slides(target_index).Select()
-                        ppt_mgr.app.CommandBars.ExecuteMso("PasteSourceFormatting")
-                        time.sleep(0.5)
-                        
-                        # Update index: we added 1 break slide
-                        target_index += 1
-                        
-                    except Exception as e:
-                        msg = f"Error inserting song {os.path.basename(song_path)}: {e}"
-                        print(msg)
-                        errors.append(msg)
-                
-                return target_index
+        # Recorded together with the songs before the sermon (see arrange_slides)
+        return {"template_ready": True}
 
-            # Process Before Bible Songs
-            current_insert_index = insert_songs_at(songs_before_bible, current_insert_index)
-            
-            # 2. Insert Break Slide AFTER Bible section
-            # The Bible section ends at the last Bible body slide.
-            # But wait, our 'current_insert_index' tracking for "Songs Before" stopped right before the Bible section started?
-            # No, the logic in the original code was: 
-            # - Insert songs after Slide 3 (Break Slide).
-            # - Then later, Slide 4 (Bible Title) and Slide 5+ (Body) come AFTER that.
-            # 
-            # CRITICAL CORRECTION: 
-            # When we insert slides at index 3, the existing slides (4, 5, etc.) shift DOWN.
-            # So Slide 4 (originally) becomes Slide 4 + N_inserted.
-            # We need to be careful. The original code did insertions *before* touching Bible slides?
-            # NO: The original code updated Bible slides FIRST (lines 224-257), THEN inserted songs (lines 264+).
-            # If we updated Bible slides first, Slide 4 and 5 are fixed content.
-            # 
-            # BUT, the original code inserted "Batch 1" at `current_insert_index = 3`. 
-            # If we insert at 3, the newly updated Bible slides (originally at 4, 5...) will be pushed down.
-            # This is CORRECT behavior if we want Songs -> Break -> Bible -> Break -> Songs.
-            #
-            # However, we must ensure `break_slide_index` (3) is still valid? Yes, Slide 3 stays at 3 unless we insert *before* 3.
-            # We are inserting *after* 3. So Slide 3 is safe.
-            # 
-            # What about the Bible slides we just updated? 
-            # We updated them *before* inserting songs.
-            # When we insert songs after Slide 3, the Bible slides (which were at 4, 5...) shift to (4+N, 5+N...).
-            # This is fine, we don't need to reference them by index anymore.
-            
-            # --- Insert Break Slide AFTER the Bible Section ---
-            # Where is the end of the Bible section?
-            # It WAS at the end of the presentation before we added "Songs After".
-            # Actually, "Songs After" are appended to the very end.
-            # So we can just append a Break Slide at the current end (which is the end of Bible body), 
-            # THEN append "Songs After".
-            
-            print("Inserting Break Slide after Bible slides...")
-            main_pres.Slides(break_slide_index).Copy()
-            # Paste at the end
-            main_pres.Slides(main_pres.Slides.Count).Select()
-            ppt_mgr.app.CommandBars.ExecuteMso("PasteSourceFormatting")
-            time.sleep(0.5)
-            
-            # Now insert "Songs After" at the very end
-            current_end_index = main_pres.Slides.Count
-            insert_songs_at(songs_after_bible, current_end_index)
+    def arrange_slides(ppt_mgr, checkpoint, main_pres, template_ready, songs_before_bible, songs_after_bible):
+        # --- Songs Insertion Logic (slide order: see service_order.py) ---
+        deck = ComDeck(ppt_mgr, main_pres, insert_mode)
 
-            print("Inserted songs and Break Slides.")
-            
-            main_pres.Save()
-            print(f"Final save to: {output_path}")
+        def song_failed(song_path, e):
+            msg = f"Error inserting song {os.path.basename(song_path)}: {e}"
+            print(msg)
+            errors.append(msg)
+
+        # Songs before the sermon go after the break slide (3); the template's Bible slides
+        # shift down behind them. Then a break slide closes the Bible section.
+        if not checkpoint.done(PHASE_BIBLE_BREAK):
+            arrange_before_sermon(deck, songs_before_bible, song_failed)
+            # Safe point, and the only deck saved mid-run (each save writes the whole deck):
+            # template, songs before the sermon and the break after the Bible are done.
+            # A crash after this point redoes only the songs after the sermon.
+            checkpoint.record(PHASE_TEMPLATE, PHASE_SONGS_BEFORE, PHASE_BIBLE_BREAK,
+                              pres=main_pres, operation=ppt_mgr.operation)
+
+        # Now insert "Songs After" at the very end
+        arrange_after_sermon(deck, songs_after_bible, song_failed)
+
+        print("Inserted songs and Break Slides.")
+        return {"slides_arranged": True}
+
+    def save_deck(ppt_mgr, main_pres, slides_arranged):
+        try:
+            with ppt_mgr.operation("SaveCopyAs", os.path.basename(writing_path)):
+                main_pres.SaveCopyAs(writing_path, 24) # 24 is ppSaveAsOpenXMLPresentation
+        except Exception as e:
+            # If we can't save, it's critical.
+            raise Exception(f"Error saving to {output_path}: {e}")
+        # Nothing left to save: closing must not prompt
+        main_pres.Saved = True
+        return {"written": True}
+
+    def close_powerpoint(written):
+        powerpoint.close()
+        return {"powerpoint_closed": True}
 
+    stages = [
+        Stage("preflight", preflight, outputs=("preflight_ok", "usable_before", "usable_after")),
+        Stage("make_output_dir", make_output_dir, ("preflight_ok",), ("output_dir_ready",)),
+        Stage("paginate_bible", paginate_bible, outputs=("bible_parts",)),
+        Stage("fill_tokens", fill_tokens, ("preflight_ok", "bible_parts"), ("working_template", "filled_tokens")),
+        Stage("load_checkpoint", load_checkpoint, ("usable_before", "usable_after"), ("checkpoint",)),
+        Stage("start_powerpoint", start_powerpoint, ("preflight_ok",), ("ppt_mgr",), com=True),
+        Stage("convert_songs", convert_songs, ("ppt_mgr", "checkpoint", "usable_before", "usable_after"),
+              ("songs_before_bible", "songs_after_bible"), com=True),
+        Stage("open_deck", open_deck, ("ppt_mgr", "checkpoint", "output_dir_ready", "working_template",
+                                       "songs_before_bible", "songs_after_bible"), ("main_pres",), com=True),
+        Stage("setup_template", setup_template, ("ppt_mgr", "checkpoint", "main_pres", "filled_tokens", "bible_parts"),
+              ("template_ready",), com=True),
+        Stage("arrange_slides", arrange_slides, ("ppt_mgr", "checkpoint", "main_pres", "template_ready",
+                                                 "songs_before_bible", "songs_after_bible"), ("slides_arranged",), com=True),
+        Stage("save", save_deck, ("ppt_mgr", "main_pres", "slides_arranged"), ("written",), com=True),
+        Stage("close_powerpoint", close_powerpoint, ("written",), ("powerpoint_closed",), com=True),
+        Stage("compact", compact, ("written",), ("compacted",)),
+        Stage("publish", publish, ("checkpoint", "compacted", "powerpoint_closed"), ("published",)),
+    ]
+    if companion:
+        stages.append(Stage("lyrics_deck", write_lyrics_deck, ("output_dir_ready", "songs_before_bible",
+                                                               "songs_after_bible", "bible_parts")))
+    pipeline = Pipeline(stages)
+
+    try:
+        with powerpoint:
+            pipeline.run({})
+        print(pipeline.timing_report())
+    except PipelineAbort:
+        pass
     except Exception as e:
         msg = f"An unexpected error occurred: {e}"
         print(msg)
         traceback.print_exc()
         errors.append(msg)
+    finally:
+        if os.path.exists(writing_path):
+            try:
+                os.remove(writing_path)
+            except OSError as e:
+                print(f"Warning: Could not remove {writing_path}: {e}")
+        if profiler:
+            write_profile_report(profiler, output_path)
     
     return errors, warnings
 
@@ -0,0 +1,523 @@
+"""
+Small helpers for reading and writing .pptx packages directly (no PowerPoint needed).
+Only the pieces the generator needs are implemented: part access, relationships,
+slide ordering, slide duplication and importing slides from another package.
+"""
+import os
+import re
+import zlib
+import struct
+import zipfile
+import tempfile
+import posixpath
+from xml.sax.saxutils import escape, unescape
+
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+RT_SLIDE = NS_REL + "/slide"
+RT_SLIDE_LAYOUT = NS_REL + "/slideLayout"
+RT_SLIDE_MASTER = NS_REL + "/slideMaster"
+RT_THEME = NS_REL + "/theme"
+RT_NOTES_SLIDE = NS_REL + "/notesSlide"
+RT_OFFICE_DOCUMENT = NS_REL + "/officeDocument"
+CT_SLIDE = "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"
+
+RELS_TEMPLATE = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\r\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{}</Relationships>'
+)
+
+_REL_RE = re.compile(r"<Relationship\s[^>]*?/>")
+_ATTR_RE = re.compile(r'([\w:]+)="([^"]*)"')
+_SLD_ID_RE = re.compile(r'<p:sldId\s[^>]*?/>')
+_MASTER_OR_LAYOUT_ID_RE = re.compile(r'<p:(?:sldMasterId|sldLayoutId)\s[^>]*?/>')
+_OVERRIDE_RE = re.compile(r"<Override\s[^>]*?/>")
+_DEFAULT_RE = re.compile(r"<Default\s[^>]*?/>")
+
+
+def xml_text(value):
+    """Escapes a Python string for use inside an XML text node."""
+    return escape(value)
+
+
+def xml_unescape(value):
+    return unescape(value, {"&quot;": '"', "&apos;": "'"})
+
+
+def parse_attrs(tag):
+    return {k: xml_unescape(v) for k, v in _ATTR_RE.findall(tag)}
+
+
+_PARA_RE = re.compile(r"<a:p(?:\s[^>]*)?>.*?</a:p>|<a:p/>", re.S)
+_TEXT_OR_BREAK_RE = re.compile(r"<a:t>(.*?)</a:t>|<a:br\b", re.S)
+
+
+def paragraph_texts(xml):
+    """Plain text of every paragraph in a slide XML string, in document order (<a:br/> -> newline)."""
+    texts = []
+    for para in _PARA_RE.finditer(xml):
+        pieces = []
+        for m in _TEXT_OR_BREAK_RE.finditer(para.group(0)):
+            pieces.append(xml_unescape(m.group(1)) if m.group(1) is not None else "\n")
+        texts.append("".join(pieces))
+    return texts
+
+
+def rels_name_for(part_name):
+    """ppt/slides/slide1.xml -> ppt/slides/_rels/slide1.xml.rels"""
+    folder, name = posixpath.split(part_name)
+    return posixpath.join(folder, "_rels", name + ".rels")
+
+
+def resolve_target(part_name, target):
+    """Resolves a relationship Target relative to the part that owns the rels file."""
+    if target.startswith("/"):
+        return target[1:]
+    folder = posixpath.dirname(part_name)
+    return posixpath.normpath(posixpath.join(folder, target))
+
+
+def relative_target(part_name, target_name):
+    return posixpath.relpath(target_name, posixpath.dirname(part_name) or ".")
+
+
+def count_slides(path):
+    """
+    Counts slides by reading only the zip central directory and ppt/presentation.xml.
+    Raises zipfile.BadZipFile / KeyError for damaged packages.
+    """
+    with zipfile.ZipFile(path) as zf:
+        pres_xml = zf.read("ppt/presentation.xml").decode("utf-8")
+    return len(_SLD_ID_RE.findall(pres_xml))
+
+
+# --- Zip writing with raw passthrough ---
+#
+# zipfile can only write entries by recompressing them. Media parts copied from a template
+# or song are already deflated (or stored), so _ZipWriter copies their compressed bytes and
+# CRC unchanged and only compresses the parts that were actually edited.
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_RECORD = struct.Struct("<IHHHHIIH")
+_FLAG_UTF8 = 0x800
+_ZIP32_LIMIT = 0xFFFFFFFF
+
+
+def read_raw_entry(fp, info):
+    """Returns the compressed bytes of a zip entry exactly as stored in the file."""
+    fp.seek(info.header_offset)
+    header = fp.read(_LOCAL_HEADER.size)
+    fields = _LOCAL_HEADER.unpack(header)
+    if fields[0] != 0x04034B50:
+        raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+    name_len, extra_len = fields[9], fields[10]
+    fp.seek(info.header_offset + _LOCAL_HEADER.size + name_len + extra_len)
+    return fp.read(info.compress_size)
+
+
+def _dos_date_time(date_time):
+    year, month, day, hour, minute, second = date_time
+    return ((max(year, 1980) - 1980) << 9 | month << 5 | day,
+            hour << 11 | minute << 5 | second // 2)
+
+
+class _ZipWriter:
+    def __init__(self, fp):
+        self.fp = fp
+        self.entries = []
+
+    def _write_entry(self, name, raw, crc, file_size, compress_type, date_time=(1980, 1, 1, 0, 0, 0)):
+        encoded = name.encode("utf-8")
+        flags = _FLAG_UTF8 if not name.isascii() else 0
+        offset = self.fp.tell()
+        if max(offset, len(raw), file_size) >= _ZIP32_LIMIT:
+            raise ValueError("Package too large for a zip32 archive.")
+        dos_date, dos_time = _dos_date_time(date_time)
+        self.fp.write(_LOCAL_HEADER.pack(0x04034B50, 20, flags, compress_type, dos_time, dos_date,
+                                         crc, len(raw), file_size, len(encoded), 0))
+        self.fp.write(encoded)
+        self.fp.write(raw)
+        self.entries.append((encoded, flags, compress_type, dos_time, dos_date, crc, len(raw), file_size, offset))
+
+    def add_raw(self, info, raw):
+        """Copies an entry byte for byte, compressed data and CRC included."""
+        self._write_entry(info.filename, raw, info.CRC, info.file_size, info.compress_type, info.date_time)
+
+    def add_bytes(self, name, data, compress_type=zipfile.ZIP_DEFLATED, date_time=(1980, 1, 1, 0, 0, 0)):
+        if compress_type == zipfile.ZIP_DEFLATED:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+            raw = compressor.compress(data) + compressor.flush()
+        else:
+            compress_type = zipfile.ZIP_STORED
+            raw = data
+        self._write_entry(name, raw, zlib.crc32(data) & 0xFFFFFFFF, len(data), compress_type, date_time)
+
+    def close(self):
+        start = self.fp.tell()
+        for encoded, flags, compress_type, dos_time, dos_date, crc, csize, size, offset in self.entries:
+            self.fp.write(_CENTRAL_HEADER.pack(0x02014B50, 20, 20, flags, compress_type, dos_time, dos_date,
+                                               crc, csize, size, len(encoded), 0, 0, 0, 0, 0, offset))
+            self.fp.write(encoded)
+        size = self.fp.tell() - start
+        if len(self.entries) > 0xFFFF or start >= _ZIP32_LIMIT:
+            raise ValueError("Package too large for a zip32 archive.")
+        self.fp.write(_END_RECORD.pack(0x06054B50, 0, 0, len(self.entries), len(self.entries), size, start, 0))
+
+
+def write_package(path, parts):
+    """Writes a new package from a {part name: bytes or str} mapping (in mapping order)."""
+    with open(path, "wb") as out:
+        writer = _ZipWriter(out)
+        for name, data in parts.items():
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            writer.add_bytes(name, data)
+        writer.close()
+
+
+def write_raw_package(path, entries):
+    """Writes a zip from (ZipInfo, compressed bytes) pairs without recompressing anything."""
+    with open(path, "wb") as out:
+        writer = _ZipWriter(out)
+        for info, raw in entries:
+            writer.add_raw(info, raw)
+        writer.close()
+
+
+class Relationship:
+    __slots__ = ("rid", "rel_type", "target", "external")
+
+    def __init__(self, rid, rel_type, target, external=False):
+        self.rid = rid
+        self.rel_type = rel_type
+        self.target = target  # Resolved part name (or raw URL when external)
+        self.external = external
+
+
+class Part:
+    """One zip entry: its central directory record and, once read or written, its bytes."""
+    __slots__ = ("name", "info", "data", "dirty")
+
+    def __init__(self, name, info=None, data=None, dirty=False):
+        self.name = name
+        self.info = info    # zipfile.ZipInfo (None for parts that only exist in memory)
+        self.data = data    # Uncompressed bytes, None until first read
+        self.dirty = dirty  # Written since opening: must be compressed again on save()
+
+
+class Package:
+    """
+    Lazy view of a .pptx zip. Opening reads only the central directory; a part is
+    decompressed on first read() and its relationships are parsed on first rels().
+    On save(), parts that were never written are copied from the source zip without
+    decompressing them; only edited or new parts are compressed again. Afterwards the
+    cached bytes of unchanged parts are released.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.parts = {}       # part name -> Part, in zip order
+        self.rels_cache = {}  # rels part name -> [Relationship]
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                self.parts[info.filename] = Part(info.filename, info)
+
+    # --- Part access ---
+
+    def names(self):
+        return list(self.parts.keys())
+
+    def has(self, name):
+        return name in self.parts
+
+    def info(self, name):
+        """The part's zip directory record (sizes, CRC), or None for a new part."""
+        return self.parts[name].info
+
+    def read(self, name):
+        part = self.parts[name]
+        if part.data is None:
+            part.data = self._load(part.info)
+        return part.data
+
+    def _load(self, info):
+        with open(self.path, "rb") as fp:
+            raw = read_raw_entry(fp, info)
+        if info.compress_type == zipfile.ZIP_STORED:
+            data = raw
+        elif info.compress_type == zipfile.ZIP_DEFLATED:
+            data = zlib.decompress(raw, -15)
+        else:
+            with zipfile.ZipFile(self.path) as zf:
+                return zf.read(info.filename)
+        if zlib.crc32(data) != info.CRC:
+            raise zipfile.BadZipFile(f"Bad CRC-32 for {info.filename}")
+        return data
+
+    def read_text(self, name):
+        return self.read(name).decode("utf-8")
+
+    def write(self, name, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        part = self.parts.get(name)
+        if part is None:
+            part = self.parts[name] = Part(name)
+        part.data = data
+        part.dirty = True
+        self.rels_cache.pop(name, None)
+
+    def delete(self, name):
+        self.parts.pop(name, None)
+        self.rels_cache.pop(name, None)
+
+    def release(self):
+        """Drops cached bytes of unchanged parts (they are re-read from the zip on demand)."""
+        for part in self.parts.values():
+            if not part.dirty and part.info is not None:
+                part.data = None
+        self.rels_cache.clear()
+
+    # --- Relationships ---
+
+    def rels(self, part_name):
+        """Returns the relationships of a part as a list of Relationship objects."""
+        rels_name = rels_name_for(part_name) if part_name else "_rels/.rels"
+        if rels_name not in self.parts:
+            return []
+        cached = self.rels_cache.get(rels_name)
+        if cached is None:
+            cached = []
+            for tag in _REL_RE.findall(self.read_text(rels_name)):
+                attrs = parse_attrs(tag)
+                external = attrs.get("TargetMode") == "External"
+                target = attrs["Target"] if external else resolve_target(part_name, attrs["Target"])
+                cached.append(Relationship(attrs["Id"], attrs["Type"], target, external))
+            self.rels_cache[rels_name] = cached
+        # Copies: callers edit the list (and targets) before write_rels()
+        return [Relationship(r.rid, r.rel_type, r.target, r.external) for r in cached]
+
+    def write_rels(self, part_name, rels):
+        rels_name = rels_name_for(part_name) if part_name else "_rels/.rels"
+        entries = []
+        for rel in rels:
+            if rel.external:
+                target = rel.target
+                mode = ' TargetMode="External"'
+            else:
+                target = relative_target(part_name or "", rel.target)
+                mode = ""
+            entries.append('<Relationship Id="{}" Type="{}" Target="{}"{}/>'.format(
+                rel.rid, rel.rel_type, xml_text(target), mode))
+        self.write(rels_name, RELS_TEMPLATE.format("".join(entries)))
+
+    def main_part(self):
+        for rel in self.rels(""):
+            if rel.rel_type == RT_OFFICE_DOCUMENT:
+                return rel.target
+        return "ppt/presentation.xml"
+
+    # --- Slides ---
+
+    def slide_names(self):
+        """Returns slide part names in presentation order."""
+        pres_name = self.main_part()
+        targets = {rel.rid: rel.target for rel in self.rels(pres_name)}
+        names = []
+        for tag in _SLD_ID_RE.findall(self.read_text(pres_name)):
+            rid = parse_attrs(tag).get("r:id")
+            if rid in targets:
+                names.append(targets[rid])
+        return names
+
+    def _next_free_name(self, pattern):
+        i = 1
+        while pattern.format(i) in self.parts:
+            i += 1
+        return pattern.format(i)
+
+    def add_content_override(self, part_name, content_type):
+        ct = self.read_text("[Content_Types].xml")
+        override = '<Override PartName="/{}" ContentType="{}"/>'.format(part_name, content_type)
+        self.write("[Content_Types].xml", ct.replace("</Types>", override + "</Types>"))
+
+    def remove_content_override(self, part_name):
+        ct = self.read_text("[Content_Types].xml")
+        pattern = r'<Override PartName="/{}" ContentType="[^"]*"/>'.format(re.escape(part_name))
+        self.write("[Content_Types].xml", re.sub(pattern, "", ct))
+
+    def drop_part(self, part_name):
+        """Deletes a part together with its rels file and content type override."""
+        self.delete(part_name)
+        self.delete(rels_name_for(part_name))
+        self.remove_content_override(part_name)
+
+    def duplicate_slide(self, slide_name, after=None):
+        """
+        Copies a slide (and its relationships) and inserts the copy directly after the original
+        (or after the slide part named by after). Notes slides are not copied.
+        Returns the new slide part name.
+        """
+        new_name = self._next_free_name("ppt/slides/slide{}.xml")
+        self.write(new_name, self.read(slide_name))
+        rels = [r for r in self.rels(slide_name) if r.rel_type != RT_NOTES_SLIDE]
+        self.write_rels(new_name, rels)
+        self.add_content_override(new_name, CT_SLIDE)
+        self._add_slide_to_presentation(new_name, after or slide_name)
+        return new_name
+
+    def _add_rel(self, part_name, rel_type, target):
+        rels = self.rels(part_name)
+        used = {r.rid for r in rels}
+        n = 1
+        while "rId{}".format(n) in used:
+            n += 1
+        rid = "rId{}".format(n)
+        rels.append(Relationship(rid, rel_type, target))
+        self.write_rels(part_name, rels)
+        return rid
+
+    def _add_slide_to_presentation(self, slide_name, after):
+        """Lists slide_name in sldIdLst right after the slide part after (None: at the end)."""
+        pres_name = self.main_part()
+        new_rid = self._add_rel(pres_name, RT_SLIDE, slide_name)
+        pres_xml = self.read_text(pres_name)
+        after_rid = next((r.rid for r in self.rels(pres_name) if r.target == after), None) if after else None
+        ids = [int(parse_attrs(t)["id"]) for t in _SLD_ID_RE.findall(pres_xml)]
+        new_tag = '<p:sldId id="{}" r:id="{}"/>'.format(max(ids + [255]) + 1, new_rid)
+
+        if after_rid is None:
+            if "</p:sldIdLst>" in pres_xml:
+                pres_xml = pres_xml.replace("</p:sldIdLst>", new_tag + "</p:sldIdLst>", 1)
+            else:
+                pres_xml = pres_xml.replace("</p:sldMasterIdLst>", "</p:sldMasterIdLst><p:sldIdLst>" + new_tag + "</p:sldIdLst>", 1)
+            self.write(pres_name, pres_xml)
+            return
+
+        def insert_after(match):
+            if parse_attrs(match.group(0)).get("r:id") == after_rid:
+                return match.group(0) + new_tag
+            return match.group(0)
+
+        self.write(pres_name, _SLD_ID_RE.sub(insert_after, pres_xml))
+
+    # --- Importing from another package ---
+
+    def content_type(self, part_name):
+        ct = self.read_text("[Content_Types].xml")
+        for tag in _OVERRIDE_RE.findall(ct):
+            attrs = parse_attrs(tag)
+            if attrs.get("PartName", "").lstrip("/") == part_name:
+                return attrs.get("ContentType")
+        ext = posixpath.splitext(part_name)[1][1:].lower()
+        for tag in _DEFAULT_RE.findall(ct):
+            attrs = parse_attrs(tag)
+            if attrs.get("Extension", "").lower() == ext:
+                return attrs.get("ContentType")
+        return None
+
+    def _set_content_type(self, part_name, content_type, source_default):
+        """Adds an Override (or the extension Default the source relied on) for a new part."""
+        if content_type is None:
+            return
+        ext = posixpath.splitext(part_name)[1][1:].lower()
+        if source_default and self.content_type(part_name) == content_type:
+            return
+        ct = self.read_text("[Content_Types].xml")
+        if source_default and not any(parse_attrs(t).get("Extension", "").lower() == ext for t in _DEFAULT_RE.findall(ct)):
+            entry = '<Default Extension="{}" ContentType="{}"/>'.format(ext, content_type)
+        else:
+            entry = '<Override PartName="/{}" ContentType="{}"/>'.format(part_name, content_type)
+        self.write("[Content_Types].xml", ct.replace("</Types>", entry + "</Types>"))
+
+    def _import_part(self, src, name, memo):
+        """Copies part name (and everything it references) from src. Returns the new part name."""
+        if name in memo:
+            return memo[name]
+        stem, ext = posixpath.splitext(name)
+        new_name = self._next_free_name(stem.rstrip("0123456789") + "{}" + ext)
+        memo[name] = new_name
+        self.write(new_name, src.read(name))  # Also reserves the name while references are imported
+        src_ct = src.content_type(name)
+        is_default = not any(parse_attrs(t).get("PartName", "").lstrip("/") == name
+                             for t in _OVERRIDE_RE.findall(src.read_text("[Content_Types].xml")))
+        self._set_content_type(new_name, src_ct, is_default)
+
+        rels = []
+        for rel in src.rels(name):
+            if rel.rel_type in (RT_NOTES_SLIDE, RT_SLIDE):
+                continue  # Notes and links to other slides stay behind
+            if rel.external or not src.has(rel.target):
+                rels.append(rel)
+            else:
+                rels.append(Relationship(rel.rid, rel.rel_type, self._import_part(src, rel.target, memo), False))
+        if rels or src.has(rels_name_for(name)):
+            self.write_rels(new_name, rels)
+        return new_name
+
+    def _register_master(self, master_name):
+        """Lists an imported slide master in the presentation and renumbers its layout ids."""
+        pres_name = self.main_part()
+        used = [int(parse_attrs(t)["id"]) for t in _MASTER_OR_LAYOUT_ID_RE.findall(self.read_text(pres_name))]
+        for rel in self.rels(pres_name):
+            if rel.rel_type == RT_SLIDE_MASTER and rel.target != master_name and self.has(rel.target):
+                used += [int(parse_attrs(t)["id"]) for t in _MASTER_OR_LAYOUT_ID_RE.findall(self.read_text(rel.target))]
+        next_id = [max(used + [2147483647]) + 1]
+
+        def renumber(match):
+            tag = match.group(0)
+            new_tag = re.sub(r'\bid="\d+"', 'id="{}"'.format(next_id[0]), tag, count=1)
+            next_id[0] += 1
+            return new_tag
+
+        self.write(master_name, _MASTER_OR_LAYOUT_ID_RE.sub(renumber, self.read_text(master_name)))
+        rid = self._add_rel(pres_name, RT_SLIDE_MASTER, master_name)
+        master_tag = '<p:sldMasterId id="{}" r:id="{}"/>'.format(next_id[0], rid)
+        pres_xml = self.read_text(pres_name)
+        self.write(pres_name, pres_xml.replace("</p:sldMasterIdLst>", master_tag + "</p:sldMasterIdLst>", 1))
+
+    def import_slide(self, src, slide_name, after=None, memo=None):
+        """
+        Copies a slide from another Package with its layout, master, theme and media (like
+        pasting with source formatting) and lists it after the slide part after (None: at the end).
+        Pass the same memo dict for every slide of one source so shared parts are copied once.
+        Returns the new slide part name.
+        """
+        memo = {} if memo is None else memo
+        before = set(memo.values())
+        new_name = self._import_part(src, slide_name, memo)
+        for name in memo.values():
+            if name not in before and name.startswith("ppt/slideMasters/") and name.endswith(".xml"):
+                self._register_master(name)
+        self._add_slide_to_presentation(new_name, after)
+        return new_name
+
+    # --- Saving ---
+
+    def save(self, path):
+        """
+        Writes the package to a temporary file next to path and renames it over path, so
+        path may be the source zip itself and a failed save leaves nothing behind.
+        """
+        in_place = os.path.exists(path) and os.path.samefile(path, self.path)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                        prefix=os.path.basename(path) + ".", suffix=".tmp")
+        try:
+            with open(self.path, "rb") as src, os.fdopen(fd, "wb") as out:
+                writer = _ZipWriter(out)
+                for part in self.parts.values():
+                    if part.info is not None and not part.dirty:
+                        writer.add_raw(part.info, read_raw_entry(src, part.info))
+                    elif part.info is not None:
+                        writer.add_bytes(part.name, part.data, part.info.compress_type, part.info.date_time)
+                    else:
+                        writer.add_bytes(part.name, part.data)
+                writer.close()
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        if in_place:
+            # The zip directory records now point into the old file: read the new one
+            self.__init__(path)
+        else:
+            self.release()
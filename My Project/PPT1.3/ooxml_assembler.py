@@ -0,0 +1,69 @@
+"""
+PowerPoint-free assembly of a service deck. The slide order comes from service_order.py,
+the same code generate_ppt uses; this module only supplies a package-level deck (slides
+are imported and duplicated in the OOXML package instead of through PowerPoint).
+
+Only explicit {{tokens}} are filled (the shape heuristics need PowerPoint), songs must be
+.pptx and the result goes through the same master/layout compaction. Used by
+verify_golden.py to check the deck structure on any OS.
+"""
+import os
+import shutil
+import tempfile
+from ooxml import Package
+from template_tokens import fill_template_tokens, token_values_for
+from compaction import compact_deck
+from service_order import BREAK_SLIDE, paginate_bible_slides, arrange_before_sermon, arrange_after_sermon
+
+
+class PackageDeck:
+    """An OOXML package, as the deck object service_order arranges."""
+    def __init__(self, pkg):
+        self.pkg = pkg
+
+    def slide_count(self):
+        return len(self.pkg.slide_names())
+
+    def insert_song(self, song_path, after):
+        song = Package(song_path)
+        anchor = self.pkg.slide_names()[after - 1]
+        memo = {}
+        slides = song.slide_names()
+        for slide in slides:
+            anchor = self.pkg.import_slide(song, slide, after=anchor, memo=memo)
+        return len(slides)
+
+    def duplicate_slide(self, index, after):
+        names = self.pkg.slide_names()
+        self.pkg.duplicate_slide(names[index - 1], after=names[after - 1])
+
+
+def assemble_deck(songs_before, songs_after, template_path, output_path, worship_title, bible_title,
+                  bible_range, bible_body, sermon_title="", compact=True):
+    """Builds the deck at output_path."""
+    bible_parts = [part.strip() for part in bible_body.split('/')]
+    token_values = token_values_for(worship_title, bible_title, bible_range, bible_parts, sermon_title)
+    token_dir = tempfile.mkdtemp(prefix="ppt_assemble_")
+    try:
+        working_path = os.path.join(token_dir, os.path.basename(template_path))
+        filled_tokens = fill_template_tokens(template_path, working_path, token_values, bible_parts)
+        pkg = Package(working_path if filled_tokens else template_path)
+        deck = PackageDeck(pkg)
+        if deck.slide_count() < BREAK_SLIDE:
+            raise ValueError("Template must have at least 3 slides.")
+
+        # Bible body pagination (already done by the token filler when {{bible_body}} is used)
+        if "bible_body" not in filled_tokens:
+            paginate_bible_slides(deck, len(bible_parts))
+
+        arrange_before_sermon(deck, songs_before)
+        arrange_after_sermon(deck, songs_after)
+
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(output_dir, exist_ok=True)
+        pkg.save(output_path)
+    finally:
+        shutil.rmtree(token_dir, ignore_errors=True)
+
+    if compact:
+        compact_deck(output_path)
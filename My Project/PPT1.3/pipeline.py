@@ -0,0 +1,99 @@
+"""
+Stage graph runner for generate_ppt.
+
+Each Stage declares the values it reads and the values it produces. Pipeline.run() starts
+a stage as soon as all of its inputs exist: plain Python stages (preflight, Bible
+pagination, token filling, the lyrics deck, compaction) run on a thread pool, while stages
+marked com=True run one at a time on the calling thread, which owns the PowerPoint COM
+apartment. Only the PowerPoint work (slide ordering) and the final write stay serial.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class PipelineAbort(Exception):
+    """Raised by a stage to stop the run; the reason is already in the errors list."""
+
+
+class Stage:
+    def __init__(self, name, func, inputs=(), outputs=(), com=False):
+        """
+        func is called with one keyword argument per input and returns a dict holding
+        every output (or None when the stage has no outputs).
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.com = com
+
+
+class Pipeline:
+    def __init__(self, stages, max_workers=4):
+        self.stages = list(stages)
+        self.max_workers = max_workers
+        self.timings = {}  # stage name -> seconds
+
+        produced = set()
+        for stage in self.stages:
+            overlap = produced.intersection(stage.outputs)
+            if overlap:
+                raise ValueError(f"Stage '{stage.name}' redefines {', '.join(sorted(overlap))}")
+            produced.update(stage.outputs)
+
+    def _call(self, stage, kwargs):
+        start = time.perf_counter()
+        result = stage.func(**kwargs) or {}
+        self.timings[stage.name] = time.perf_counter() - start
+        missing = [name for name in stage.outputs if name not in result]
+        if missing:
+            raise RuntimeError(f"Stage '{stage.name}' did not produce {', '.join(missing)}")
+        return result
+
+    def run(self, values):
+        """
+        Runs every stage. values holds the initial inputs and receives all outputs
+        (it is only ever modified on the calling thread). Returns values.
+        """
+        pending = list(self.stages)
+        running = {}  # future -> stage
+
+        def collect(futures):
+            for future in futures:
+                stage = running.pop(future)
+                result = future.result()  # Re-raises the stage's exception here
+                values.update((name, result[name]) for name in stage.outputs)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage") as pool:
+            try:
+                while pending or running:
+                    ready = [s for s in pending if all(name in values for name in s.inputs)]
+                    for stage in ready:
+                        if not stage.com:
+                            pending.remove(stage)
+                            kwargs = {name: values[name] for name in stage.inputs}
+                            running[pool.submit(self._call, stage, kwargs)] = stage
+
+                    com_ready = [s for s in ready if s.com]
+                    if com_ready:
+                        # One COM stage at a time, in declaration order, while the pool keeps working
+                        stage = com_ready[0]
+                        pending.remove(stage)
+                        result = self._call(stage, {name: values[name] for name in stage.inputs})
+                        values.update((name, result[name]) for name in stage.outputs)
+                        collect([f for f in list(running) if f.done()])
+                    elif running:
+                        done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                        collect(done)
+                    elif pending:
+                        names = ", ".join(s.name for s in pending)
+                        raise RuntimeError(f"Stages waiting for inputs nobody produces: {names}")
+            except BaseException:
+                for future in running:
+                    future.cancel()
+                raise
+        return values
+
+    def timing_report(self):
+        parts = [f"{name} {seconds:.2f}s" for name, seconds in self.timings.items()]
+        return "Stage timings: " + ", ".join(parts)
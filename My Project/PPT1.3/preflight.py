@@ -0,0 +1,147 @@
+"""
+Preflight validation of every generator input before PowerPoint is launched.
+
+Every .pptx is read completely once to verify the CRC-32 of each part, so a truncated or
+damaged song is rejected here instead of failing inside PowerPoint halfway through a run.
+All checks run in parallel on a thread pool and report every problem at once.
+"""
+import os
+import zlib
+import struct
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from ooxml import count_slides
+
+# Legacy .ppt files are OLE compound files (CFB) and start with this signature
+CFB_SIGNATURE = b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1"
+
+CFB_HEADER_SIZE = 512
+
+MIN_TEMPLATE_SLIDES = 3
+MIN_TEMPLATE_SLIDES_WEDNESDAY = 6  # Slide 6 holds the sermon title
+
+
+def lock_file_for(path):
+    """PowerPoint keeps '~$name.pptx' next to a file while it is open."""
+    folder, name = os.path.split(path)
+    return os.path.join(folder, "~$" + name)
+
+
+def check_zip_integrity(path):
+    """Returns the name of the first part whose data is damaged, or None when every CRC matches."""
+    with zipfile.ZipFile(path) as zf:
+        try:
+            return zf.testzip()
+        except (zlib.error, EOFError) as e:
+            raise zipfile.BadZipFile(str(e))
+
+
+def check_cfb_size(path):
+    """A compound file always consists of whole sectors; a shorter file was cut off."""
+    with open(path, "rb") as f:
+        header = f.read(CFB_HEADER_SIZE)
+    size = os.path.getsize(path)
+    if len(header) < CFB_HEADER_SIZE:
+        return False
+    sector_shift = struct.unpack_from("<H", header, 30)[0]
+    if sector_shift not in (9, 12):  # 512- or 4096-byte sectors
+        return False
+    return size % (1 << sector_shift) == 0
+
+
+def check_deck(path, min_slides=1):
+    """Returns (errors, warnings) for a single .ppt/.pptx input."""
+    errors = []
+    warnings = []
+    name = os.path.basename(path)
+
+    if not os.path.exists(path):
+        warnings.append(f"File not found: {path}")
+        return errors, warnings
+
+    if os.path.getsize(path) == 0:
+        errors.append(f"{name} is empty (0 bytes).")
+        return errors, warnings
+
+    if os.path.exists(lock_file_for(path)):
+        warnings.append(f"{name} seems to be open in PowerPoint (lock file found).")
+
+    lower = path.lower()
+    try:
+        if lower.endswith(".pptx"):
+            damaged = check_zip_integrity(path)
+            if damaged:
+                errors.append(f"{name} is damaged (CRC check failed for {damaged}).")
+                return errors, warnings
+            slide_count = count_slides(path)
+            if slide_count < min_slides:
+                errors.append(f"{name} has {slide_count} slides, at least {min_slides} required.")
+        elif lower.endswith(".ppt"):
+            with open(path, "rb") as f:
+                valid_header = f.read(len(CFB_SIGNATURE)) == CFB_SIGNATURE
+            if not valid_header:
+                errors.append(f"{name} is not a valid PowerPoint file (bad .ppt header).")
+            elif not check_cfb_size(path):
+                errors.append(f"{name} is damaged (file is truncated).")
+        else:
+            warnings.append(f"Skipping unsupported file type: {name}")
+    except (zipfile.BadZipFile, KeyError) as e:
+        errors.append(f"{name} is not a valid PowerPoint file (damaged package: {e}).")
+    except OSError as e:
+        errors.append(f"Cannot read {name}: {e}")
+
+    return errors, warnings
+
+
+def check_template(template_path, min_slides):
+    if not os.path.exists(template_path):
+        return [f"Template file not found: {template_path}"], []
+    errors, warnings = check_deck(template_path, min_slides)
+    return [f"Template: {e}" for e in errors], [f"Template: {w}" for w in warnings]
+
+
+def check_output(output_path):
+    """Checks that output_path can be written (directory access and no open copy in PowerPoint)."""
+    errors = []
+    warnings = []
+    output_path = os.path.abspath(output_path)
+    name = os.path.basename(output_path)
+
+    # The directory may not exist yet (generate_ppt creates it), so check the nearest existing parent
+    folder = os.path.dirname(output_path)
+    while folder and not os.path.isdir(folder):
+        parent = os.path.dirname(folder)
+        if parent == folder:
+            break
+        folder = parent
+    if not os.path.isdir(folder):
+        errors.append(f"Output folder is not reachable: {os.path.dirname(output_path)}")
+    elif not os.access(folder, os.W_OK):
+        errors.append(f"No write access to output folder: {folder}")
+
+    if os.path.exists(lock_file_for(output_path)):
+        errors.append(f"{name} is open in PowerPoint. Close it before generating.")
+    elif os.path.exists(output_path) and not os.access(output_path, os.W_OK):
+        errors.append(f"Output file is read-only: {output_path}")
+
+    return errors, warnings
+
+
+def run_preflight(songs_before, songs_after, template_path, output_path, wednesday=False):
+    """
+    Validates the template, every song and the output location in parallel.
+    Returns (errors, warnings) in input order: template, songs, output.
+    """
+    min_slides = MIN_TEMPLATE_SLIDES_WEDNESDAY if wednesday else MIN_TEMPLATE_SLIDES
+    checks = [(check_template, (template_path, min_slides))]
+    checks += [(check_deck, (path,)) for path in list(songs_before) + list(songs_after)]
+    checks.append((check_output, (output_path,)))
+
+    errors = []
+    warnings = []
+    with ThreadPoolExecutor(max_workers=min(8, len(checks))) as pool:
+        results = pool.map(lambda check: check[0](*check[1]), checks)
+        for errs, warns in results:
+            errors.extend(errs)
+            warnings.extend(warns)
+    return errors, warnings
@@ -0,0 +1,228 @@
+"""
+Speculative preparation while the operator is still editing the inputs.
+
+The GUI hands the current inputs to Preparer.update() once they have stopped changing.
+In the background the preparer then
+  - starts a spare generation worker (process start-up and imports done ahead of time),
+  - runs the preflight checks, so problems show up before Generate is clicked,
+  - fills the template tokens into a cache file that generate_ppt picks up,
+  - parses the text of every listed song into a per-file cache that the lyrics-only
+    deck of generate_ppt reads instead of parsing the song again.
+
+Everything is keyed on the inputs, including size and mtime of the files: when anything
+changes the key changes and the old preparation is simply never used again.
+"""
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from ooxml import count_slides
+from checkpoint import inputs_key
+from preflight import run_preflight
+from template_tokens import fill_template_tokens, token_values_for
+from companion import song_slides
+
+PREPARE_DIR = os.path.join(tempfile.gettempdir(), "ppt_prepare")
+SONG_CACHE_DIR = os.path.join(PREPARE_DIR, "songs")
+MAX_CACHED_TEMPLATES = 8
+MAX_CACHED_SONGS = 1000
+
+
+def _template_cache_path(template_path, token_values, bible_parts):
+    key = inputs_key([template_path], [os.path.abspath(template_path), token_values, bible_parts])
+    return os.path.join(PREPARE_DIR, key + os.path.splitext(template_path)[1])
+
+
+def _recent_first(folder):
+    entries = [os.path.join(folder, n) for n in os.listdir(folder) if n.endswith(".json")]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    return entries
+
+
+def _prune_templates():
+    """Keeps the most recently used MAX_CACHED_TEMPLATES filled templates."""
+    try:
+        entries = _recent_first(PREPARE_DIR)
+    except OSError:
+        return
+    for meta_path in entries[MAX_CACHED_TEMPLATES:]:
+        for path in (meta_path, os.path.splitext(meta_path)[0]):
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # Still open in PowerPoint; removed on a later run
+
+
+def prepare_template(template_path, token_values, bible_parts):
+    """
+    Fills the template tokens once per (template, values) and caches the result.
+    Returns (path of the filled template or None when it has no tokens, set of filled tokens).
+    """
+    path = _template_cache_path(template_path, token_values, bible_parts)
+    meta_path = path + ".json"
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            filled = set(json.load(f)["filled"])
+        if not filled:
+            os.utime(meta_path)
+            return None, filled
+        if os.path.exists(path):
+            os.utime(meta_path)
+            return path, filled
+    except (OSError, ValueError, KeyError):
+        pass
+
+    os.makedirs(PREPARE_DIR, exist_ok=True)
+    # Unique temporary names: the GUI and a worker may prepare the same key at once
+    fd, tmp_path = tempfile.mkstemp(dir=PREPARE_DIR, suffix=".tmp")
+    os.close(fd)
+    try:
+        filled = fill_template_tokens(template_path, tmp_path, token_values, bible_parts)
+        if filled:
+            os.replace(tmp_path, path)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"template": os.path.abspath(template_path), "filled": sorted(filled)}, f)
+        os.replace(tmp_path, meta_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    _prune_templates()
+    return (path if filled else None), filled
+
+
+def _song_cache_path(path):
+    key = hashlib.sha1(os.path.normcase(os.path.abspath(path)).encode("utf-8")).hexdigest()
+    return os.path.join(SONG_CACHE_DIR, key + ".json")
+
+
+def read_song(path):
+    """
+    Parses a .pptx song once per version of the file. Returns {'slide_count', 'slides'},
+    slides being companion.song_slides(path). The entry is cached under the path with the
+    size and mtime it was read at; once the file changes it no longer matches and is
+    parsed again (and the entry replaced).
+    """
+    st = os.stat(path)
+    cache_path = _song_cache_path(path)
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        if entry["size"] == st.st_size and entry["mtime"] == st.st_mtime_ns:
+            os.utime(cache_path)
+            return entry
+    except (OSError, ValueError, KeyError):
+        pass
+
+    entry = {"path": os.path.abspath(path), "size": st.st_size, "mtime": st.st_mtime_ns,
+             "slide_count": count_slides(path), "slides": song_slides(path)}
+    try:
+        os.makedirs(SONG_CACHE_DIR, exist_ok=True)
+        # Unique temporary names: the GUI and a worker may read the same song at once
+        fd, tmp_path = tempfile.mkstemp(dir=SONG_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: Could not cache {os.path.basename(path)}: {e}")
+    return entry
+
+
+def cached_song_slides(path):
+    """companion.song_slides(path), from the cache read_song keeps."""
+    return read_song(path)["slides"]
+
+
+def _prune_songs():
+    """Keeps the entries of the MAX_CACHED_SONGS most recently used songs."""
+    try:
+        entries = _recent_first(SONG_CACHE_DIR)
+    except OSError:
+        return
+    for path in entries[MAX_CACHED_SONGS:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class Preparer:
+    """
+    Prepares the latest inputs on a background thread. update() never blocks; inputs
+    that arrive while a preparation runs replace each other, only the newest is prepared.
+    """
+    def __init__(self, on_status=None, prestart=None):
+        self.on_status = on_status
+        self.prestart = prestart  # Starts a spare generation worker
+        self.lock = threading.Lock()
+        self.pending = None
+        self.running = False
+        self.prepared_key = None
+        self.last_status = ""
+
+    def report(self, text):
+        self.last_status = text
+        if self.on_status:
+            self.on_status(text)
+
+    def update(self, args):
+        """args: (songs_before, songs_after, template_path, output_path, worship_title, bible_title, bible_range, bible_body, sermon_title)"""
+        with self.lock:
+            self.pending = tuple(args)
+            if self.running:
+                return
+            self.running = True
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def _loop(self):
+        while True:
+            with self.lock:
+                args, self.pending = self.pending, None
+                if args is None:
+                    self.running = False
+                    return
+            try:
+                self.prepare(*args)
+            except Exception as e:
+                print(f"Warning: Background preparation failed: {e}")
+                self.report("")
+
+    def prepare(self, songs_before, songs_after, template_path, output_path, worship_title, bible_title, bible_range, bible_body, sermon_title=""):
+        songs = list(songs_before) + list(songs_after)
+        values = [list(songs_before), list(songs_after), template_path, output_path, worship_title,
+                  bible_title, bible_range, bible_body, sermon_title]
+        key = inputs_key([template_path] + songs, values)
+        if key == self.prepared_key:
+            self.report(self.last_status)
+            return
+
+        if self.prestart:
+            self.prestart()
+
+        errors, warnings = run_preflight(songs_before, songs_after, template_path, output_path, wednesday=bool(sermon_title))
+        if errors:
+            self.prepared_key = key
+            more = f" (+{len(errors) - 1} more)" if len(errors) > 1 else ""
+            self.report(f"Check inputs: {errors[0]}{more}")
+            return
+
+        bible_parts = [part.strip() for part in bible_body.split('/')]
+        token_values = token_values_for(worship_title, bible_title, bible_range, bible_parts, sermon_title)
+        try:
+            prepare_template(template_path, token_values, bible_parts)
+        except Exception as e:
+            # generate_ppt reports this properly; the heuristics still work
+            print(f"Warning: Could not prepare template tokens: {e}")
+
+        slide_count = 0
+        for path in songs:
+            if path.lower().endswith(".pptx"):
+                try:
+                    slide_count += read_song(path)["slide_count"]
+                except Exception as e:
+                    print(f"Warning: Could not read {os.path.basename(path)}: {e}")
+        _prune_songs()
+
+        self.prepared_key = key
+        note = f", {len(warnings)} warning(s)" if warnings else ""
+        self.report(f"Ready: {len(songs)} song(s), {slide_count} slide(s) read, template prepared{note}")
@@ -0,0 +1,115 @@
+"""
+Single-flight scheduler in front of generate_ppt.
+
+Only one job runs at a time, whatever its output path: every generation drives the same
+PowerPoint instance, and one job's Quit() (or a watchdog restart killing PowerPoint)
+would break any other job running next to it. The queue holds at most one request per
+output path. A click with the same inputs as the running or queued job for that path is
+coalesced into it, a click with different inputs supersedes the queued one (latest wins),
+so repeated clicks never multiply work. Queued paths run in the order they were first queued.
+"""
+import os
+import threading
+
+
+def _freeze(value):
+    """Makes argument lists hashable so identical requests compare equal."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class Job:
+    def __init__(self, output_path, args):
+        self.output_path = output_path
+        self.args = args
+        self.key = _freeze(args)
+        self.clicks = 1
+
+
+class GenerationScheduler:
+    # submit() results
+    STARTED = "started"
+    COALESCED = "coalesced"
+    QUEUED = "queued"
+    SUPERSEDED = "superseded"
+
+    def __init__(self, runner, on_status=None):
+        """
+        runner(*args) performs one generation (called on a worker thread).
+        on_status(text) is called whenever the queue changes.
+        """
+        self.runner = runner
+        self.on_status = on_status
+        self.lock = threading.Lock()
+        self.active = None  # (output key, running Job)
+        self.pending = {}   # output key -> queued Job (at most one per path, latest wins)
+
+    @staticmethod
+    def output_key(output_path):
+        return os.path.normcase(os.path.abspath(output_path))
+
+    def submit(self, output_path, args):
+        """Schedules runner(*args) for output_path. Returns one of the submit result constants."""
+        job = Job(output_path, args)
+        key = self.output_key(output_path)
+        with self.lock:
+            active_key, active = self.active or (None, None)
+            pending = self.pending.get(key)
+            if active is None:
+                self.active = (key, job)
+                result = self.STARTED
+            elif active_key == key and active.key == job.key:
+                # Latest request equals the running one: anything queued for this path is obsolete
+                self.pending.pop(key, None)
+                active.clicks += 1
+                result = self.COALESCED
+            elif pending is not None and pending.key == job.key:
+                pending.clicks += 1
+                result = self.COALESCED
+            else:
+                result = self.SUPERSEDED if pending is not None else self.QUEUED
+                self.pending[key] = job
+
+        if result == self.STARTED:
+            self._start(job)
+        self._report()
+        return result
+
+    def _start(self, job):
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+
+    def _run(self, job):
+        try:
+            self.runner(*job.args)
+        finally:
+            with self.lock:
+                next_job = None
+                if self.pending:
+                    next_key = next(iter(self.pending))
+                    next_job = self.pending.pop(next_key)
+                    self.active = (next_key, next_job)
+                else:
+                    self.active = None
+            if next_job is not None:
+                self._start(next_job)
+            self._report()
+
+    def status_text(self):
+        with self.lock:
+            active = self.active[1] if self.active else None
+            queued = [os.path.basename(job.output_path) for job in self.pending.values()]
+        if active is None:
+            return "Idle"
+        text = f"Generating: {os.path.basename(active.output_path)}"
+        if queued:
+            text += f" | {len(queued)} request(s) queued"
+        return text
+
+    def _report(self):
+        if self.on_status:
+            self.on_status(self.status_text())
+
+    def is_busy(self):
+        with self.lock:
+            return self.active is not None
@@ -0,0 +1,62 @@
+"""
+Slide order of a service deck, shared by generate_ppt (PowerPoint) and ooxml_assembler
+(package level, used by verify_golden.py), so the golden check runs the same ordering code:
+
+    template slides 1-3, each before-sermon song followed by a copy of the break slide (3),
+    Bible title (4), one Bible body slide (5) per part, the rest of the template (sermon
+    slide in Wednesday mode), a break slide, then each after-sermon song followed by a
+    break slide.
+
+The functions work on a deck object with three methods (slide indexes are 1-based):
+
+    slide_count()
+    insert_song(song_path, after) -> number of slides inserted after slide `after`
+    duplicate_slide(index, after)    copy of slide `index` placed right after slide `after`
+"""
+import os
+
+BREAK_SLIDE = 3
+BIBLE_BODY_SLIDE = 5
+
+
+def paginate_bible_slides(deck, part_count):
+    """
+    Makes one Bible body slide per part (copies of slide 5 right after it).
+    Returns the indexes of the body slides, or [] when the template has no slide 5.
+    """
+    if deck.slide_count() < BIBLE_BODY_SLIDE:
+        return []
+    for i in range(1, part_count):
+        deck.duplicate_slide(BIBLE_BODY_SLIDE, BIBLE_BODY_SLIDE + i - 1)
+    return list(range(BIBLE_BODY_SLIDE, BIBLE_BODY_SLIDE + max(part_count, 1)))
+
+
+def insert_songs(deck, song_paths, after, on_error=None):
+    """
+    Inserts each song after slide `after`, followed by a copy of the break slide.
+    on_error(song_path, exception) skips a failing song instead of raising.
+    Returns the index of the last inserted slide.
+    """
+    for song_path in song_paths:
+        print(f"Inserting song: {os.path.basename(song_path)}")
+        try:
+            after += deck.insert_song(song_path, after)
+            deck.duplicate_slide(BREAK_SLIDE, after)
+            after += 1
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(song_path, e)
+    return after
+
+
+def arrange_before_sermon(deck, songs_before, on_error=None):
+    """Songs after the break slide, then a break slide after the Bible section (end of the template)."""
+    insert_songs(deck, songs_before, BREAK_SLIDE, on_error)
+    print("Inserting Break Slide after Bible slides...")
+    deck.duplicate_slide(BREAK_SLIDE, deck.slide_count())
+
+
+def arrange_after_sermon(deck, songs_after, on_error=None):
+    """Songs at the very end."""
+    insert_songs(deck, songs_after, deck.slide_count(), on_error)
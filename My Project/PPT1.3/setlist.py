@@ -0,0 +1,146 @@
+"""
+Setlist import: matches a pasted setlist ("1. 주님의 마음 2. 은혜 ...") against the song folder.
+
+Song file names and first-slide titles are normalised (NFC, case folded, punctuation and
+spaces removed), Hangul syllables are decomposed into jamo (은혜 -> ㅇㅡㄴㅎㅖ) so a typo
+in one letter only changes a few n-grams, and every jamo trigram is indexed. A query
+scores the songs sharing its trigrams by Dice similarity; only songs in the posting lists
+are ever looked at, so matching stays in the milliseconds for thousands of files.
+
+A line of dashes ("---") or "설교" in the setlist separates the songs before the sermon
+from the songs after it.
+"""
+import os
+import re
+import unicodedata
+from song_fingerprint import SongIndex, preferred_name
+
+NGRAM = 3
+MIN_SCORE = 0.35  # Below this a line is reported as unmatched
+ALTERNATIVES = 3
+
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONGSEONG = ["", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ", "ㄿ", "ㅀ",
+              "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+_HANGUL_FIRST, _HANGUL_LAST = 0xAC00, 0xD7A3
+
+_COPY_SUFFIX_RE = re.compile(r"\s*(\(\d+\)|- 복사본|- copy)$", re.I)
+_NON_WORD_RE = re.compile(r"[\W_]+")
+_NUMBERING_RE = re.compile(r"(?:^|\s)\d{1,2}\s*[.)]\s*")
+_BULLET_RE = re.compile(r"^\s*[-*•·]\s+")
+_SEPARATOR_RE = re.compile(r"^\s*(-{3,}|=+|설교|sermon)\s*$", re.I)
+
+
+def decompose(text):
+    """Replaces every Hangul syllable with its jamo (compatibility letters)."""
+    out = []
+    for ch in text:
+        code = ord(ch)
+        if _HANGUL_FIRST <= code <= _HANGUL_LAST:
+            index = code - _HANGUL_FIRST
+            out.append(_CHOSEONG[index // 588])
+            out.append(_JUNGSEONG[index % 588 // 28])
+            out.append(_JONGSEONG[index % 28])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def normalise_title(text):
+    """Song title or file name -> jamo string without case, punctuation or spaces."""
+    text = unicodedata.normalize("NFC", text)
+    if text.lower().endswith((".pptx", ".ppt")):
+        text = os.path.splitext(text)[0]
+    text = _COPY_SUFFIX_RE.sub("", text).casefold()
+    return decompose(_NON_WORD_RE.sub("", text))
+
+
+def ngrams(normalised):
+    if len(normalised) <= NGRAM:
+        return {normalised} if normalised else set()
+    return {normalised[i:i + NGRAM] for i in range(len(normalised) - NGRAM + 1)}
+
+
+class SongMatcher:
+    def __init__(self, songs):
+        """songs: {file name: [texts the song is known by (file name, first-slide title)]}"""
+        self.keys = []      # (file name, gram set) per indexed text
+        self.postings = {}  # gram -> [key index]
+        for name, texts in songs.items():
+            seen = set()
+            for text in texts:
+                grams = ngrams(normalise_title(text))
+                if not grams or frozenset(grams) in seen:
+                    continue
+                seen.add(frozenset(grams))
+                for gram in grams:
+                    self.postings.setdefault(gram, []).append(len(self.keys))
+                self.keys.append((name, grams))
+
+    def match(self, query, limit=ALTERNATIVES + 1):
+        """[(file name, score 0..1)], best first; equal scores prefer the original over a copy."""
+        grams = ngrams(normalise_title(query))
+        if not grams:
+            return []
+        shared = {}
+        for gram in grams:
+            for key in self.postings.get(gram, ()):
+                shared[key] = shared.get(key, 0) + 1
+        best = {}
+        for key, count in shared.items():
+            name, key_grams = self.keys[key]
+            score = 2 * count / (len(grams) + len(key_grams))
+            if score > best.get(name, 0):
+                best[name] = score
+        # Copy suffixes are not scored, so "은혜 (1).pptx" ties with "은혜.pptx": prefer the original
+        ranked = sorted(best.items(), key=lambda item: (-item[1], preferred_name(item[0])))
+        return ranked[:limit]
+
+
+def build_matcher(folder, names):
+    """Indexes the file names plus the first-slide title of each song (from the fingerprint cache)."""
+    fingerprints = SongIndex(folder).refresh(names)
+    songs = {}
+    for name in names:
+        texts = [name]
+        lines = fingerprints.get(name, {}).get("lines")
+        if lines:
+            texts.append(lines[0])
+        songs[name] = texts
+    return SongMatcher(songs)
+
+
+def parse_setlist(text):
+    """Returns (songs before the sermon, songs after it) as lists of titles."""
+    before, after = [], []
+    current = before
+    for line in text.splitlines():
+        if _SEPARATOR_RE.match(line):
+            current = after
+            continue
+        line = _BULLET_RE.sub("", line)
+        # "1. 주님의 마음 2. 은혜" may arrive on a single line
+        for title in _NUMBERING_RE.split(line):
+            title = title.strip()
+            if title:
+                current.append(title)
+    return before, after
+
+
+def match_setlist(matcher, text):
+    """
+    Matches every setlist entry. Returns (before, after), each a list of
+    {'query', 'match' (file name or None), 'score', 'alternatives': [(file name, score)]}.
+    """
+    def resolve(titles):
+        results = []
+        for title in titles:
+            ranked = matcher.match(title)
+            top = ranked[0] if ranked and ranked[0][1] >= MIN_SCORE else (None, ranked[0][1] if ranked else 0.0)
+            alternatives = [r for r in ranked if r[0] != top[0] and r[1] >= MIN_SCORE / 2][:ALTERNATIVES]
+            results.append({"query": title, "match": top[0], "score": top[1], "alternatives": alternatives})
+        return results
+
+    before, after = parse_setlist(text)
+    return resolve(before), resolve(after)
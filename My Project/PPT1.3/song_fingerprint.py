@@ -0,0 +1,242 @@
+"""
+Duplicate-song detection for the song folder.
+
+Each .pptx is fingerprinted by its normalised slide text (NFC, case and whitespace folded)
+and the CRC-32/size of every media part its slides use (taken from the zip directory, so
+images are never decompressed). Fingerprints are cached in '.song_fingerprints.json'
+in the user's local app data folder for the packaged .exe (its own folder is a temporary
+unpack directory) or next to the scripts for the source build, per song folder and keyed
+by size and mtime, so a refresh only reads files that changed and nothing is written into
+the song folder. Songs with the same text
+and media are exact duplicates ("곡.pptx" / "곡 (1).pptx"); songs whose lyric lines mostly
+overlap are near duplicates. Near-duplicate candidates come from an inverted index over
+the lyric lines, so only songs sharing a line are ever compared.
+"""
+import os
+import re
+import sys
+import json
+import math
+import hashlib
+import tempfile
+import unicodedata
+from ooxml import Package, paragraph_texts
+
+CACHE_NAME = ".song_fingerprints.json"
+APP_DATA_NAME = "PPT Automation Tool"
+CACHE_VERSION = 2
+NEAR_DUPLICATE_THRESHOLD = 0.7  # Jaccard similarity of the lyric line sets
+
+_SPACE_RE = re.compile(r"\s+")
+_COPY_SUFFIX_RE = re.compile(r"\s*(\(\d+\)|- 복사본|- copy)$", re.I)
+_MEDIA_REF_RE = re.compile(r'r:(?:embed|link)="([^"]*)"')
+
+
+def normalise_line(text):
+    text = unicodedata.normalize("NFC", text).casefold()
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def fingerprint_song(path):
+    """{'text': sha1, 'lines': [normalised lines], 'media': ['crc:size', ...], 'slides': n}"""
+    pkg = Package(path)
+    slides = pkg.slide_names()
+    lines = []
+    media = set()
+    for slide in slides:
+        xml = pkg.read_text(slide)
+        for para in paragraph_texts(xml):
+            for line in para.split("\n"):
+                line = normalise_line(line)
+                if line:
+                    lines.append(line)
+        rels = {r.rid: r for r in pkg.rels(slide)}
+        for rid in _MEDIA_REF_RE.findall(xml):
+            rel = rels.get(rid)
+            if rel and not rel.external and pkg.has(rel.target):
+                info = pkg.info(rel.target)
+                media.add(f"{info.CRC:08x}:{info.file_size}")
+    return {
+        "text": hashlib.sha1("\n".join(lines).encode("utf-8")).hexdigest(),
+        "lines": lines,
+        "media": sorted(media),
+        "slides": len(slides),
+    }
+
+
+def default_cache_dir():
+    """
+    Folder for the cache. A onefile PyInstaller build runs from a _MEI* folder that is
+    deleted on exit, so it uses %LOCALAPPDATA% (or the folder of the .exe) instead.
+    """
+    if getattr(sys, "frozen", False):
+        local_app_data = os.environ.get("LOCALAPPDATA")
+        if local_app_data:
+            return os.path.join(local_app_data, APP_DATA_NAME)
+        return os.path.dirname(os.path.abspath(sys.executable))
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == CACHE_VERSION:
+            return data.get("folders", {})
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+class SongIndex:
+    def __init__(self, folder, cache_dir=None):
+        self.folder = folder
+        self.folder_key = os.path.normcase(os.path.abspath(folder))
+        self.cache_path = os.path.join(cache_dir or default_cache_dir(), CACHE_NAME)
+        # file name -> {"size", "mtime", "fp"}
+        self.entries = _load_cache(self.cache_path).get(self.folder_key, {})
+
+    def refresh(self, names):
+        """Fingerprints of the given file names, hashing only new or changed files."""
+        result = {}
+        changed = False
+        for name in names:
+            path = os.path.join(self.folder, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entry = self.entries.get(name)
+            if entry and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime_ns:
+                result[name] = entry["fp"]
+                continue
+            try:
+                fp = fingerprint_song(path)
+            except Exception as e:
+                print(f"Warning: Could not fingerprint {name}: {e}")
+                continue
+            self.entries[name] = {"size": st.st_size, "mtime": st.st_mtime_ns, "fp": fp}
+            result[name] = fp
+            changed = True
+
+        # Forget files that are gone from the folder
+        for name in list(self.entries):
+            if not os.path.exists(os.path.join(self.folder, name)):
+                del self.entries[name]
+                changed = True
+        if changed:
+            self.save()
+        return result
+
+    def save(self):
+        # Other song folders share the file; re-read so their entries are kept
+        folders = _load_cache(self.cache_path)
+        folders[self.folder_key] = self.entries
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.cache_path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_VERSION, "folders": folders}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            # Read-only cache folder: still works, just without the cache
+            print(f"Warning: Could not save song fingerprint cache: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def _similar_pairs(line_sets, threshold):
+    """
+    Pairs of names whose line sets have a Jaccard similarity >= threshold.
+
+    Lines are ordered rarest first. Two sets that reach the threshold must share a line
+    within the first len - ceil(threshold * len) + 1 lines of each (prefix filtering), so
+    only those prefixes go into the inverted index, and common lines ("후렴", "아멘") never
+    make every song a candidate of every other.
+    """
+    frequency = {}
+    for lines in line_sets.values():
+        for line in lines:
+            frequency[line] = frequency.get(line, 0) + 1
+
+    index = {}  # line -> names whose prefix contains it
+    pairs = []
+    # Smallest sets first: a candidate from the index is never larger than the current set
+    for name in sorted(line_sets, key=lambda n: (len(line_sets[n]), n)):
+        lines = line_sets[name]
+        if not lines:
+            continue
+        ordered = sorted(lines, key=lambda line: (frequency[line], line))
+        prefix = ordered[:len(lines) - math.ceil(threshold * len(lines) - 1e-9) + 1]
+        candidates = set()
+        for line in prefix:
+            candidates.update(index.get(line, ()))
+        for other in candidates:
+            other_lines = line_sets[other]
+            if len(other_lines) < threshold * len(lines):
+                continue  # Too small to ever reach the threshold
+            shared = len(lines & other_lines)
+            if shared / (len(lines) + len(other_lines) - shared) >= threshold:
+                pairs.append((other, name))
+        for line in prefix:
+            index.setdefault(line, []).append(name)
+    return pairs
+
+
+def preferred_name(name):
+    """Sort key choosing which copy to keep: no '(1)' suffix first, then the shortest name."""
+    stem = os.path.splitext(name)[0]
+    return (bool(_COPY_SUFFIX_RE.search(stem)), len(name), name)
+
+
+def find_duplicates(fingerprints, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """
+    Groups duplicate songs. Returns a list of {'keep': name, 'duplicates': [names], 'kind': 'exact'|'near'}
+    where keep is the copy to prefer.
+    """
+    names = sorted(fingerprints)
+    parent = {name: name for name in names}
+
+    def find(name):
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    def union(a, b):
+        parent[find(a)] = find(b)
+
+    def key(name):
+        return fingerprints[name]["text"], tuple(fingerprints[name]["media"])
+
+    # Exact: same text and media
+    by_key = {}
+    for name in names:
+        if key(name) in by_key:
+            union(name, by_key[key(name)])
+        else:
+            by_key[key(name)] = name
+
+    # Near: one representative per exact group, compared only with songs sharing lines
+    line_sets = {name: set(fingerprints[name]["lines"]) for name in by_key.values()}
+    for a, b in _similar_pairs(line_sets, threshold):
+        union(a, b)
+
+    groups = {}
+    for name in names:
+        groups.setdefault(find(name), []).append(name)
+    result = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        members.sort(key=preferred_name)
+        kind = "exact" if len({key(m) for m in members}) == 1 else "near"
+        result.append({"keep": members[0], "duplicates": members[1:], "kind": kind})
+    result.sort(key=lambda g: g["keep"])
+    return result
+
+
+def find_duplicate_songs(folder, names):
+    """Convenience wrapper: fingerprints names in folder (incrementally) and groups duplicates."""
+    return find_duplicates(SongIndex(folder).refresh(names))
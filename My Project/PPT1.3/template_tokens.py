@@ -0,0 +1,157 @@
+"""
+Placeholder-token templating for worship templates.
+
+A template can carry explicit tokens such as {{worship_title}} or {{bible_body}} in any
+text box. All tokens on a slide are filled in a single pass over the slide XML, keeping
+the formatting of the run the token starts in (PowerPoint often splits "{{", the name
+and "}}" into separate runs, so tokens are matched on the paragraph text, not per run).
+"""
+import re
+from ooxml import Package, xml_text, xml_unescape
+
+TOKEN_NAMES = ("worship_title", "bible_title", "bible_range", "bible_body", "sermon_title")
+
+_TOKEN_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+_PARA_RE = re.compile(r"<a:p(?:\s[^>]*)?>.*?</a:p>", re.S)
+_RUN_RE = re.compile(r"<a:r>(?P<inner>.*?)</a:r>", re.S)
+_RUN_TEXT_RE = re.compile(r"<a:t>(?P<text>.*?)</a:t>|<a:t/>", re.S)
+_RUN_PROPS_RE = re.compile(r"<a:rPr\b[^>]*?/>|<a:rPr\b.*?</a:rPr>", re.S)
+
+
+def token_values_for(worship_title, bible_title, bible_range, bible_parts, sermon_title=""):
+    """Token values of one service; {{bible_body}} starts with the first Bible part."""
+    return {
+        "worship_title": worship_title,
+        "bible_title": bible_title,
+        "bible_range": bible_range,
+        "bible_body": bible_parts[0],
+        "sermon_title": sermon_title,
+    }
+
+
+def find_tokens(xml):
+    """Returns the set of token names used in a slide's XML (tokens may span runs)."""
+    found = set()
+    for para in _PARA_RE.finditer(xml):
+        text = "".join(_run_texts(para.group(0)))
+        found.update(m.group(1) for m in _TOKEN_RE.finditer(text))
+    return found
+
+
+def _run_texts(para_xml):
+    texts = []
+    for run in _RUN_RE.finditer(para_xml):
+        m = _RUN_TEXT_RE.search(run.group("inner"))
+        texts.append(xml_unescape(m.group("text") or "") if m else "")
+    return texts
+
+
+def _render_run(inner, text):
+    """Rebuilds a run with new text. Line breaks become <a:br/> with the run's properties."""
+    props_match = _RUN_PROPS_RE.search(inner)
+    props = props_match.group(0) if props_match else ""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+
+    def run_for(line):
+        new_inner = _RUN_TEXT_RE.sub(lambda m: "<a:t>{}</a:t>".format(xml_text(line)), inner, count=1)
+        return "<a:r>{}</a:r>".format(new_inner)
+
+    if len(lines) == 1:
+        return run_for(lines[0])
+    br = "<a:br>{}</a:br>".format(props) if props else "<a:br/>"
+    return br.join(run_for(line) for line in lines)
+
+
+def _fill_paragraph(para_xml, values, filled):
+    runs = list(_RUN_RE.finditer(para_xml))
+    if not runs:
+        return para_xml
+    texts = _run_texts(para_xml)
+    joined = "".join(texts)
+    if "{{" not in joined:
+        return para_xml
+
+    # Owner run for every character of the paragraph text
+    owner = []
+    for i, t in enumerate(texts):
+        owner.extend([i] * len(t))
+
+    new_texts = [""] * len(texts)
+    pos = 0
+    changed = False
+    for m in _TOKEN_RE.finditer(joined):
+        name = m.group(1)
+        if name not in values:
+            continue
+        for p in range(pos, m.start()):
+            new_texts[owner[p]] += joined[p]
+        new_texts[owner[m.start()]] += values[name]
+        filled.add(name)
+        changed = True
+        pos = m.end()
+    if not changed:
+        return para_xml
+    for p in range(pos, len(joined)):
+        new_texts[owner[p]] += joined[p]
+
+    out = []
+    last = 0
+    for run, text, new_text in zip(runs, texts, new_texts):
+        out.append(para_xml[last:run.start()])
+        if text == new_text:
+            out.append(run.group(0))
+        else:
+            out.append(_render_run(run.group("inner"), new_text))
+        last = run.end()
+    out.append(para_xml[last:])
+    return "".join(out)
+
+
+def fill_tokens(xml, values):
+    """
+    Replaces every known {{token}} in a slide XML string in one pass.
+    Returns (new_xml, set_of_filled_token_names).
+    """
+    filled = set()
+    result = _PARA_RE.sub(lambda m: _fill_paragraph(m.group(0), values, filled), xml)
+    return result, filled
+
+
+def fill_template_tokens(template_path, output_path, values, bible_parts=None):
+    """
+    Fills placeholder tokens in a template and writes the result to output_path.
+
+    The slide holding {{bible_body}} is duplicated once per entry of bible_parts and
+    each copy receives its own part. Returns the set of token names that were filled;
+    when the template carries no tokens at all, nothing is written and an empty set
+    is returned so the caller can fall back to the shape heuristics.
+    """
+    pkg = Package(template_path)
+    slides = pkg.slide_names()
+    slide_xml = {name: pkg.read_text(name) for name in slides}
+    tokens_by_slide = {name: find_tokens(xml) for name, xml in slide_xml.items()}
+    if not any(tokens_by_slide.values()):
+        return set()
+
+    filled = set()
+    for name in slides:
+        tokens = tokens_by_slide[name]
+        if not tokens:
+            continue
+        if "bible_body" in tokens and bible_parts:
+            # Paginate: one copy of the body slide per part, in order
+            targets = [name]
+            for _ in bible_parts[1:]:
+                targets.append(pkg.duplicate_slide(targets[-1]))
+            for target, part in zip(targets, bible_parts):
+                slide_values = dict(values, bible_body=part)
+                new_xml, done = fill_tokens(slide_xml[name], slide_values)
+                pkg.write(target, new_xml)
+                filled |= done
+        else:
+            new_xml, done = fill_tokens(slide_xml[name], values)
+            pkg.write(name, new_xml)
+            filled |= done
+
+    pkg.save(output_path)
+    return filled
@@ -46,14 +46,38 @@ def test_error_handling():
     print(f"Errors: {errors}")
     print(f"Warnings: {warnings}")
     
-    if any("Failed to convert" in e for e in errors):
-        print("PASS: Correctly identified conversion failure.")
+    # Preflight rejects the file before PowerPoint is started
+    if any("not a valid PowerPoint file" in e for e in errors):
+        print("PASS: Correctly identified invalid file.")
     else:
-        print("FAIL: Did not report conversion failure.")
+        print("FAIL: Did not report invalid file.")
+
+    # 3. Test with a damaged .pptx (zip directory intact, part data corrupted)
+    print("\nTest 3: Damaged PPTX file")
+    damaged_pptx = "damaged_song.pptx"
+    with open(template_path, "rb") as f:
+        data = bytearray(f.read())
+    data[len(data) // 3] ^= 0xFF
+    with open(damaged_pptx, "wb") as f:
+        f.write(data)
+
+    songs_before = [os.path.abspath(damaged_pptx)]
+
+    errors, warnings = generate_ppt(songs_before, songs_after, os.path.abspath(template_path), os.path.abspath(output_path), "Title", "Range", "Body")
+
+    print(f"Errors: {errors}")
+    print(f"Warnings: {warnings}")
+
+    if any("damaged" in e for e in errors):
+        print("PASS: Correctly identified damaged file.")
+    else:
+        print("FAIL: Did not report damaged file.")
 
     # Cleanup
     if os.path.exists(invalid_ppt):
         os.remove(invalid_ppt)
+    if os.path.exists(damaged_pptx):
+        os.remove(damaged_pptx)
     if os.path.exists(output_path):
         os.remove(output_path)
         
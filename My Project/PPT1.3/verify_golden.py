@@ -0,0 +1,210 @@
+"""
+Golden-deck structural regression check (no PowerPoint needed).
+
+Builds decks from generated fixture songs with friday.pptx / wednesday.pptx through
+ooxml_assembler, which arranges the slides with service_order.py, the ordering code
+generate_ppt uses as well. Every slide is canonicalised (shape ids, creation ids and rIds
+removed, relationship targets replaced by their content) and checked:
+
+  1. for every case, the slide roles follow the service order, written out independently
+     in expected_roles(): template 1-3, songs each followed by a break copy, Bible title
+     and body parts, the rest of the template, a break, then the after-sermon songs each
+     followed by a break;
+  2. for the few GOLDEN_CASES, the canonical structure equals the reviewed one stored in
+     golden/structures.json (one "role layout digest" line per slide).
+
+Usage: python verify_golden.py [--update] [--case SUBSTRING]
+"""
+import os
+import re
+import io
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import itertools
+import contextlib
+from ooxml import Package, RT_SLIDE_LAYOUT
+from compaction import fingerprint_parts
+from companion import write_companion_pptx
+from ooxml_assembler import assemble_deck
+from service_order import BREAK_SLIDE, BIBLE_BODY_SLIDE
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_PATH = os.path.join(BASE_DIR, "golden", "structures.json")
+TEMPLATES = {"friday": "friday.pptx", "wednesday": "wednesday.pptx"}
+
+# Fixture songs: name -> slides (lines per slide)
+FIXTURE_SONGS = {
+    "song_a": [["Song A", "first verse"]],
+    "song_b": [["Song B"], ["chorus line one", "chorus line two"]],
+    "song_c": [["Song C"], ["verse"], ["bridge & <ending>"]],
+    "song_d": [["Song D"], ["1"], ["2"], ["3"]],
+}
+
+# Small reviewed set compared slide by slide: empty service, typical Friday/Wednesday
+# services, a paginated Bible text and only after-sermon songs
+GOLDEN_CASES = (
+    "friday-b0-a0-p1",
+    "friday-b2-a1-p1",
+    "friday-b1-a3-p3",
+    "wednesday-b0-a2-p1",
+    "wednesday-b3-a1-p2",
+)
+
+_VOLATILE_RE = re.compile(r"<p14:creationId\b[^>]*/>|<a16:creationId\b[^>]*/>")
+_SHAPE_ID_RE = re.compile(r'(<p:cNvPr\s+)id="\d+"')
+_RID_ATTR_RE = re.compile(r'(r:(?:id|embed|link))="([^"]*)"')
+_LAYOUT_NAME_RE = re.compile(r'<p:cSld\b[^>]*\bname="([^"]*)"')
+
+
+def canonical_slides(pkg):
+    """[(layout name, digest)] per slide with ids and rIds replaced by stable content."""
+    result = []
+    for slide in pkg.slide_names():
+        rels = {r.rid: r for r in pkg.rels(slide)}
+        layout_name = ""
+        for rel in rels.values():
+            if rel.rel_type == RT_SLIDE_LAYOUT:
+                m = _LAYOUT_NAME_RE.search(pkg.read_text(rel.target))
+                layout_name = m.group(1) if m else ""
+
+        def replace_rid(m):
+            rel = rels.get(m.group(2))
+            if rel is None:
+                return m.group(0)
+            target = rel.target if rel.external else fingerprint_parts(pkg, [rel.target])[rel.target]
+            return '{}="{}"'.format(m.group(1), target)
+
+        xml = _VOLATILE_RE.sub("", pkg.read_text(slide))
+        xml = _SHAPE_ID_RE.sub(r'\1id=""', xml)
+        xml = _RID_ATTR_RE.sub(replace_rid, xml)
+        result.append((layout_name, hashlib.sha1(xml.encode("utf-8")).hexdigest()[:12]))
+    return result
+
+
+def write_fixtures(folder):
+    paths = {}
+    for name, slides in FIXTURE_SONGS.items():
+        paths[name] = os.path.join(folder, name + ".pptx")
+        write_companion_pptx(paths[name], [{"lines": lines} for lines in slides])
+    return paths
+
+
+def build_cases():
+    cases = []
+    song_names = sorted(FIXTURE_SONGS)
+    for template, n_before, n_after, n_parts in itertools.product(sorted(TEMPLATES), range(4), range(4), range(1, 4)):
+        before = song_names[:n_before]
+        after = list(reversed(song_names))[:n_after]
+        case_id = f"{template}-b{n_before}-a{n_after}-p{n_parts}"
+        cases.append({"id": case_id, "template": template, "before": before, "after": after, "parts": n_parts})
+    return cases
+
+
+def expected_roles(case, template_roles):
+    """template_roles[i - 1] is the role of template slide i (identical slides share one role)."""
+    break_role = template_roles[BREAK_SLIDE - 1]
+
+    def songs(names):
+        roles = []
+        for name in names:
+            roles += [f"{name}:{i}" for i in range(1, len(FIXTURE_SONGS[name]) + 1)]
+            roles.append(break_role)
+        return roles
+
+    roles = template_roles[:BREAK_SLIDE]
+    roles += songs(case["before"])
+    for i in range(BREAK_SLIDE + 1, len(template_roles) + 1):
+        roles.append(template_roles[i - 1])
+        if i == BIBLE_BODY_SLIDE:
+            roles += [template_roles[i - 1]] * (case["parts"] - 1)
+    roles.append(break_role)
+    roles += songs(case["after"])
+    return roles
+
+
+def run_case(case, fixtures, sources, out_dir):
+    output_path = os.path.join(out_dir, case["id"] + ".pptx")
+    template_path = os.path.join(BASE_DIR, TEMPLATES[case["template"]])
+    bible_body = " / ".join(f"part {i}" for i in range(1, case["parts"] + 1))
+    sermon_title = "Sermon" if case["template"] == "wednesday" else ""
+    with contextlib.redirect_stdout(io.StringIO()):
+        assemble_deck([fixtures[n] for n in case["before"]], [fixtures[n] for n in case["after"]], template_path,
+                      output_path, "Worship", "Bible title", "Bible range", bible_body, sermon_title)
+    slides = canonical_slides(Package(output_path))
+    os.remove(output_path)
+    # Role of each slide: which source slide it is a copy of
+    return [f"{sources.get(digest, 'unknown')} {layout} {digest}" for layout, digest in slides]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Structural regression check for generated decks.")
+    parser.add_argument("--update", action="store_true", help="rewrite golden/structures.json (GOLDEN_CASES)")
+    parser.add_argument("--case", default="", help="only run cases whose id contains this text")
+    args = parser.parse_args(argv)
+
+    golden = {}
+    if os.path.exists(GOLDEN_PATH):
+        with open(GOLDEN_PATH, "r", encoding="utf-8") as f:
+            golden = json.load(f)
+
+    with tempfile.TemporaryDirectory(prefix="golden_") as tmp:
+        fixtures = write_fixtures(tmp)
+
+        # Canonical digest of every source slide -> role name
+        sources = {}
+        template_roles = {}
+        for template, file_name in TEMPLATES.items():
+            slides = canonical_slides(Package(os.path.join(BASE_DIR, file_name)))
+            for i, (_, digest) in enumerate(slides, 1):
+                sources.setdefault(digest, f"template:{i}")
+            template_roles[template] = [sources[digest] for _, digest in slides]
+        for name, path in fixtures.items():
+            for i, (_, digest) in enumerate(canonical_slides(Package(path)), 1):
+                sources.setdefault(digest, f"{name}:{i}")
+
+        cases = [c for c in build_cases() if args.case in c["id"]]
+        failures = 0
+        results = {}
+        start = time.perf_counter()
+        for case in cases:
+            structure = run_case(case, fixtures, sources, tmp)
+            if case["id"] in GOLDEN_CASES:
+                results[case["id"]] = structure
+            roles = [entry.split(" ")[0] for entry in structure]
+            expected = expected_roles(case, template_roles[case["template"]])
+            if roles != expected:
+                failures += 1
+                print(f"FAIL: {case['id']} slide order\n  expected {expected}\n  got      {roles}")
+            elif not args.update and case["id"] in GOLDEN_CASES and golden.get(case["id"]) != structure:
+                failures += 1
+                print(f"FAIL: {case['id']} differs from golden structure")
+                old = golden.get(case["id"]) or []
+                for i, (a, b) in enumerate(itertools.zip_longest(old, structure), 1):
+                    if a != b:
+                        print(f"  slide {i}: golden {a} != {b}")
+        elapsed = time.perf_counter() - start
+
+    rate = len(cases) / elapsed * 60 if elapsed else 0
+    print(f"{len(cases)} case(s) in {elapsed:.2f}s ({rate:.0f} cases/min), {failures} failure(s)")
+
+    if args.update:
+        golden = results
+        os.makedirs(os.path.dirname(GOLDEN_PATH), exist_ok=True)
+        with open(GOLDEN_PATH, "w", encoding="utf-8") as f:
+            json.dump(golden, f, ensure_ascii=False, indent=1, sort_keys=True)
+            f.write("\n")
+        print(f"Golden structures written to: {GOLDEN_PATH}")
+
+    if failures:
+        print("Verification FAILED.")
+        return 1
+    print("Verification PASSED.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
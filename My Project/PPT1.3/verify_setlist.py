@@ -0,0 +1,44 @@
+"""
+Checks the setlist matcher without PowerPoint: copy ties, typo tolerance and the sermon separator.
+
+Usage: python verify_setlist.py
+"""
+from setlist import SongMatcher, parse_setlist
+
+
+def check(label, ok, detail=""):
+    print(f"{'PASS' if ok else 'FAIL'}: {label}{(' - ' + detail) if detail and not ok else ''}")
+    return ok
+
+
+def test_setlist():
+    print("--- Starting Setlist Verification ---")
+    results = []
+
+    # 1. A copy ("은혜 (1).pptx") scores the same as the original; the original must win
+    print("\nTest 1: Copy suffix tie")
+    for names in (["은혜 (1).pptx", "은혜.pptx"], ["은혜.pptx", "은혜 (1).pptx"], ["은혜 - 복사본.pptx", "은혜.pptx"]):
+        matcher = SongMatcher({name: [name] for name in names})
+        ranked = matcher.match("은혜")
+        results.append(check(f"{names} -> 은혜.pptx", ranked[0][0] == "은혜.pptx" and ranked[0][1] == ranked[1][1], str(ranked)))
+
+    # 2. A one-letter typo still finds the song
+    print("\nTest 2: Typo")
+    matcher = SongMatcher({"주님의 마음.pptx": ["주님의 마음.pptx"], "주님 다시 오실 때까지.pptx": ["주님 다시 오실 때까지.pptx"]})
+    ranked = matcher.match("주님의 마음을")
+    results.append(check("'주님의 마음을' -> 주님의 마음.pptx", ranked and ranked[0][0] == "주님의 마음.pptx", str(ranked)))
+
+    # 3. Numbered entries on one line and the '---' separator
+    print("\nTest 3: Parsing")
+    before, after = parse_setlist("1. 은혜 2. 주님의 마음\n---\n- 축복송")
+    results.append(check("before/after split", (before, after) == (["은혜", "주님의 마음"], ["축복송"]), str((before, after))))
+
+    if all(results):
+        print("\nVerification PASSED.")
+    else:
+        print(f"\nVerification FAILED ({results.count(False)} of {len(results)} checks).")
+    return all(results)
+
+
+if __name__ == "__main__":
+    test_setlist()